@@ -1,5 +1,4 @@
 import streamlit as st
-import os
 from backend_test import chat_with_multi_agent, process_image
 from PIL import Image
 
@@ -26,21 +25,13 @@ if uploaded_image:
     st.sidebar.image(uploaded_image, caption="Uploaded Image", use_column_width=True)
     st.sidebar.success("Processing image...")
 
-    # Save image temporarily
-    image_path = f"temp_{uploaded_image.name}"
-    with open(image_path, "wb") as f:
-        f.write(uploaded_image.getbuffer())
-
-    # Get AI response for image
-    response = process_image(image_path)
+    # Get AI response for image, decoded straight from the upload buffer
+    response = process_image(uploaded_image.getbuffer())
 
     # Add image response to chat
     st.session_state.messages.append({"role": "assistant", "content": response})
     st.chat_message("assistant").markdown(response)
 
-    # Clean up saved image
-    os.remove(image_path)
-
 # Process Text Input
 user_input = st.chat_input("Type your fashion query...")
 
@@ -1,5 +1,4 @@
 import streamlit as st
-import os
 from backendex import chat_with_multi_agent, process_image
 from PIL import Image
 
@@ -73,16 +72,11 @@ with col2:
     if uploaded_image and "last_processed_image" not in st.session_state:
         st.session_state.last_processed_image = uploaded_image.name
         
-        # Save image temporarily
-        image_path = f"temp_{uploaded_image.name}"
-        with open(image_path, "wb") as f:
-            f.write(uploaded_image.getbuffer())
-        
         try:
             # Processing indicator
             with st.spinner("Analyzing your fashion image..."):
-                # Get AI response for image
-                response = process_image(image_path)
+                # Get AI response for image, decoded straight from the upload buffer
+                response = process_image(uploaded_image.getbuffer())
                 
                 # Add image response to chat
                 st.session_state.messages.append({"role": "assistant", "content": response})
@@ -95,11 +89,6 @@ with col2:
         except Exception as e:
             error_msg = f"Error processing image: {str(e)}"
             st.error(error_msg)
-        
-        finally:
-            # Clean up saved image
-            if os.path.exists(image_path):
-                os.remove(image_path)
     
     # Clear image processing flag when new image is uploaded
     elif uploaded_image and st.session_state.get("last_processed_image") != uploaded_image.name:
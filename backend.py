@@ -6,6 +6,7 @@ from imageRecom import image_recommendation
 from customercare import handle_customer_query
 from dotenv import load_dotenv
 import re
+import lazy_loader
 
 load_dotenv()
 
@@ -142,14 +143,18 @@ def chat_with_multi_agent(user_input):
 
     return response
 
-def process_image(image_path):
-    """Handles image-based queries using the ImageRecommendationAgent."""
+def process_image(image):
+    """Handles image-based queries using the ImageRecommendationAgent (path, bytes or an in-memory upload)."""
     try:
-        raw_response = image_recommendation(image_path)
+        raw_response = image_recommendation(image)
         return clean_response(raw_response)
     except Exception as e:
         return f"I'm sorry, I couldn't process that image. Error: {str(e)}"
 
+def warmup():
+    """Loads every model, index and API client in parallel instead of on the first request that needs it."""
+    return lazy_loader.warmup()
+
 def chat():
     """Interactive CLI chat for testing (does not interfere with Streamlit)."""
     print("\n👋 Welcome to Vasavi AI! I'm your personal stylist. How can I assist you today?\n")
@@ -170,4 +175,6 @@ def chat():
 
 # Run CLI chat only if executed directly
 if __name__ == "__main__":
+    if "--warmup" in sys.argv:
+        warmup()
     chat()
\ No newline at end of file
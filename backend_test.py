@@ -86,9 +86,9 @@ def chat_with_multi_agent(user_input):
 
     return response
 
-def process_image(image_path):
-    """Handles image-based queries using the ImageRecommendationAgent."""
-    return image_recommendation(image_path)
+def process_image(image):
+    """Handles image-based queries using the ImageRecommendationAgent (path, bytes or an in-memory upload)."""
+    return image_recommendation(image)
 
 def chat():
     """Interactive CLI chat for testing (does not interfere with Streamlit)."""
@@ -1,11 +1,12 @@
 import sys
 from phi.agent import Agent
 from trendAgent import fetch_trend_insights
-from textRecom import get_fashion_recommendations
+from textRecom import get_fashion_recommendations, cached_answer
 from imageRecom import image_recommendation
 from customercare import handle_customer_query
 from dotenv import load_dotenv
 import re
+import lazy_loader
 
 load_dotenv()
 
@@ -128,20 +129,27 @@ def chat_with_multi_agent(user_input):
     
     for key, agent in keywords.items():
         if key in user_input.lower():
+            if agent is text_recommendation_agent:
+                # Paraphrased recommendation requests reuse the answer instead of another LLM round trip
+                return cached_answer(user_input, lambda: clean_response(agent.run(user_input)), kind="agent")
             raw_response = agent.run(user_input)
             return clean_response(raw_response)
     
     raw_response = multi_agent.run(user_input)
     return clean_response(raw_response)
 
-def process_image(image_path):
-    """Handles image-based queries using the ImageRecommendationAgent."""
+def process_image(image):
+    """Handles image-based queries using the ImageRecommendationAgent (path, bytes or an in-memory upload)."""
     try:
-        raw_response = image_recommendation(image_path)
+        raw_response = image_recommendation(image)
         return clean_response(raw_response)
     except Exception as e:
         return f"I'm sorry, I couldn't process that image. Error: {str(e)}"
 
+def warmup():
+    """Loads every model, index and API client in parallel instead of on the first request that needs it."""
+    return lazy_loader.warmup()
+
 def chat():
     """Interactive CLI chat for testing (does not interfere with Streamlit)."""
     print("\n👋 Welcome to Vasavi AI! I'm your personal stylist. How can I assist you today?\n")
@@ -158,4 +166,6 @@ def chat():
         print(response, "\n")
 
 if __name__ == "__main__":
+    if "--warmup" in sys.argv:
+        warmup()
     chat()
\ No newline at end of file
@@ -0,0 +1,96 @@
+import argparse
+import time
+import numpy as np
+import faiss
+import image_index
+from embedding_store import ShardedEmbeddingStore
+
+# ✅ Recall / latency / memory benchmark for the image catalog index types
+# Usage:
+#   python benchmark_image_index.py                    # embeddings cached by vit_transformer.py
+#   python benchmark_image_index.py --synthetic 50000  # random catalog of a given size
+
+def load_catalog_embeddings(path):
+    store = ShardedEmbeddingStore(path)
+    if not len(store):
+        raise FileNotFoundError(f"❌ No embeddings in '{path}'! Run vit_transformer.py first or pass --synthetic N.")
+    return store.vectors(list(store.locations))
+
+def synthetic_embeddings(n, d=768, seed=0):
+    # Clustered vectors behave more like real product photos than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 50), d)).astype(np.float32)
+    return centers[rng.integers(0, len(centers), n)] + 0.3 * rng.normal(size=(n, d)).astype(np.float32)
+
+def make_queries(embeddings, n_queries, seed=1):
+    # Perturbed catalog vectors stand in for shopper uploads of similar items
+    rng = np.random.default_rng(seed)
+    picks = embeddings[rng.integers(0, len(embeddings), n_queries)]
+    noise = rng.normal(scale=0.05 * float(np.std(embeddings)), size=picks.shape).astype(np.float32)
+    return np.ascontiguousarray(picks + noise)
+
+def recall_at_k(ground_truth, found):
+    hits = sum(len(set(gt) & set(f)) for gt, f in zip(ground_truth, found))
+    return hits / ground_truth.size
+
+def timed_search(index, queries, k):
+    """Searches one query at a time, the way imageRecom does, and returns ids plus per-query latency (ms)."""
+    ids, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        _, found = index.search(q[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(found[0])
+    return np.array(ids), np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare image index types against the flat baseline.")
+    parser.add_argument("--embeddings", default="embedding_shards")
+    parser.add_argument("--synthetic", type=int, default=0, help="benchmark a random catalog of N vectors instead")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--rerank-k-factor", type=int, nargs="+", default=[2, 4, 8])
+    args = parser.parse_args()
+
+    embeddings = synthetic_embeddings(args.synthetic) if args.synthetic else load_catalog_embeddings(args.embeddings)
+    queries = make_queries(embeddings, args.queries)
+    k = min(args.k, len(embeddings))
+    print(f"📊 Catalog: {len(embeddings)} vectors x {embeddings.shape[1]} dims, {len(queries)} queries, k={k}\n")
+
+    flat = image_index.build_index(embeddings, "flat")
+    _, ground_truth = flat.search(queries, k)
+
+    configs = [("flat", {}, {})]
+    configs += [("ivf", {}, {"nprobe": p}) for p in args.nprobe]
+    configs += [("hnsw", {}, {"ef_search": ef}) for ef in args.ef_search]
+    configs += [("sq8", {"rerank": False}, {}), ("fp16", {"rerank": False}, {}), ("pq", {"rerank": False}, {})]
+    configs += [("pq", {"rerank": True}, {"rerank_k_factor": kf}) for kf in args.rerank_k_factor]
+
+    print(f"{'index':<32}{'build s':>9}{'bytes/item':>12}{f'recall@{k}':>11}{'p50 ms':>9}{'p99 ms':>9}")
+    built = {}
+    for index_type, build_params, search_params in configs:
+        build_key = (index_type, tuple(sorted(build_params.items())))
+        if build_key not in built:
+            start = time.perf_counter()
+            built[build_key] = (image_index.build_index(embeddings, index_type, **build_params), time.perf_counter() - start)
+        index, build_seconds = built[build_key]
+        image_index.configure_search(index, **search_params)
+
+        found, latencies = timed_search(index, queries, k)
+        info = image_index.describe_index(index)
+        label = index_type + "".join(f" {name}={value}" for name, value in search_params.items())
+        if index_type == "ivf":
+            label += f" nlist={info['nlist']}"
+        if index_type == "pq":
+            label += f" M={info['M']}x{info['nbits']}b"
+        print(
+            f"{label:<32}{build_seconds:>9.2f}{image_index.memory_per_item(index):>12.0f}"
+            f"{recall_at_k(ground_truth, found):>11.3f}"
+            f"{np.percentile(latencies, 50):>9.3f}{np.percentile(latencies, 99):>9.3f}"
+        )
+
+if __name__ == "__main__":
+    faiss.omp_set_num_threads(1)  # single-query latency, as served
+    main()
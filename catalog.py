@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import shutil
+import argparse
+import numpy as np
+import pandas as pd
+from metadata_index import parse_price
+
+# ✅ Product sheet: parsing shared by the indexer (dataset_index.py) and the in-process retrieval indexes
+SHEET_PATH = os.getenv("CATALOG_SHEET", "vasavi_quantities_sheet.xlsx")
+
+# ✅ Columnar snapshot of the sheet: one .npy per column, opened memory-mapped, rebuilt when the sheet changes
+SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", ".catalog_snapshot")
+SNAPSHOT_VERSION = 1  # bump when the column layout changes
+TEXT_COLUMNS = {
+    "style_number": "STYLE NUMBER",
+    "name": "STYLE NAME",
+    "description": "DESCRIPTION",
+    "price_text": "PRICES",
+    "fabric": "FABRIC DESCRIPTION",
+}
+SIZES = ["XS", "S", "M", "L", "XL"]
+
+def read_sheet(path=SHEET_PATH):
+    """Parses the Excel sheet itself (slow: use load_sheet, which goes through the snapshot)."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ File '{path}' not found!")
+
+    df = pd.read_excel(path)
+
+    # Rename columns properly
+    expected_columns = [
+        "S.NO", "STYLE IMAGE", "NaN1", "STYLE NAME", "NaN2", "STYLE NUMBER",
+        "DESCRIPTION", "PRICES", "FABRIC DESCRIPTION", "XS", "S", "M", "L", "XL", "TOTAL"
+    ]
+    if len(df.columns) < len(expected_columns):
+        raise ValueError("❌ Excel file format mismatch. Check column names!")
+
+    df.columns = expected_columns
+
+    # Drop unnecessary columns
+    df = df.drop(columns=["NaN1", "NaN2", "STYLE IMAGE"]).iloc[1:].reset_index(drop=True)
+
+    # Handle missing values
+    df.fillna("", inplace=True)
+    df["STYLE NUMBER"] = df["STYLE NUMBER"].astype(str).str.strip()
+    df["PRICES"] = df["PRICES"].astype(str).str.strip()
+    df = df[df["STYLE NUMBER"] != ""]  # Remove rows without style number
+    return df.reset_index(drop=True)
+
+class CatalogSnapshot:
+    """Read-only catalog columns, memory-mapped from the snapshot directory.
+
+    Columns: style_number, name, description, price_text, fabric (str), price (float, NaN = unknown),
+    stock (rows x SIZES, int) and total (int).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.columns = {
+            name[:-len(".npy")]: np.load(os.path.join(directory, name), mmap_mode="r")
+            for name in os.listdir(directory) if name.endswith(".npy")
+        }
+
+    def __len__(self):
+        return len(self.columns["style_number"])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def frame(self):
+        """The snapshot in read_sheet's layout (sheet column names), so existing DataFrame code keeps working."""
+        df = pd.DataFrame({sheet: self.columns[name].astype(object) for name, sheet in TEXT_COLUMNS.items()})
+        for i, size in enumerate(SIZES):
+            df[size] = np.asarray(self.columns["stock"][:, i])
+        df["TOTAL"] = np.asarray(self.columns["total"])
+        return df
+
+def _signature(path):
+    stat = os.stat(path)
+    return {"source": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "version": SNAPSHOT_VERSION}
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, "manifest.json"), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def _counts(series):
+    return pd.to_numeric(series, errors="coerce").fillna(0).astype(np.int32).to_numpy()
+
+def build_snapshot(path=SHEET_PATH, directory=SNAPSHOT_DIR):
+    """Converts the sheet into a new snapshot generation; readers switch over when manifest.json is replaced."""
+    signature = _signature(path)
+    df = read_sheet(path)
+
+    columns = {name: df[sheet].astype(str).to_numpy(dtype=str) for name, sheet in TEXT_COLUMNS.items()}
+    columns["price"] = np.array([parse_price(p) for p in df["PRICES"]], dtype=np.float64)
+    columns["stock"] = np.stack([_counts(df[size]) for size in SIZES], axis=1) if len(df) else np.zeros((0, len(SIZES)), np.int32)
+    columns["total"] = _counts(df["TOTAL"])
+
+    # Each generation gets its own directory, so processes still mapping the previous one are never disturbed
+    os.makedirs(directory, exist_ok=True)
+    generation = catalog_version(path, directory)
+    final_dir = os.path.join(directory, generation)
+    if not os.path.isdir(final_dir):
+        tmp_dir = os.path.join(directory, f".tmp-{generation}-{os.getpid()}")
+        os.makedirs(tmp_dir, exist_ok=True)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), values, allow_pickle=False)
+        try:
+            os.replace(tmp_dir, final_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)  # another process published the same generation first
+
+    manifest_path = os.path.join(directory, "manifest.json")
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({**signature, "generation": generation, "rows": len(df)}, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    # Older generations go; on Linux their files stay readable to processes that still map them
+    for name in os.listdir(directory):
+        stale = os.path.join(directory, name)
+        if name != generation and not name.startswith(".") and os.path.isdir(stale):
+            shutil.rmtree(stale, ignore_errors=True)
+    return CatalogSnapshot(final_dir)
+
+def open_snapshot(path=SHEET_PATH, directory=SNAPSHOT_DIR):
+    """Memory-mapped catalog; the sheet is only parsed again when its size or modification time changed."""
+    manifest = _read_manifest(directory)
+    if not os.path.exists(path):
+        if manifest is None:
+            raise FileNotFoundError(f"❌ File '{path}' not found!")
+        print(f"⚠️ '{path}' not found, serving the last catalog snapshot ({manifest['rows']} styles)")
+        return CatalogSnapshot(os.path.join(directory, manifest["generation"]))
+
+    signature = _signature(path)
+    if manifest is not None and all(manifest.get(key) == value for key, value in signature.items()):
+        generation_dir = os.path.join(directory, manifest["generation"])
+        if os.path.isdir(generation_dir):
+            return CatalogSnapshot(generation_dir)
+
+    start_time = time.time()
+    snapshot = build_snapshot(path, directory)
+    print(f"✅ Catalog snapshot rebuilt from '{path}': {len(snapshot)} styles in {time.time() - start_time:.2f}s")
+    return snapshot
+
+def catalog_version(path=SHEET_PATH, directory=SNAPSHOT_DIR):
+    """Snapshot generation the sheet currently maps to (a stat call, no parsing); changes whenever the sheet does."""
+    if not os.path.exists(path):
+        manifest = _read_manifest(directory)
+        return manifest["generation"] if manifest else None
+    signature = _signature(path)
+    return f"{signature['size']}-{signature['mtime_ns']}-v{SNAPSHOT_VERSION}"
+
+def load_sheet(path=SHEET_PATH):
+    """Cleaned sheet as a DataFrame, served from the columnar snapshot."""
+    return open_snapshot(path).frame()
+
+def build_records(df):
+    """Vectorized product texts & metadata: returns (ids, texts, metadata dicts), one per row."""
+    texts = (
+        df["STYLE NAME"].astype(str) + " - " + df["DESCRIPTION"].astype(str) + " - "
+        + df["FABRIC DESCRIPTION"].astype(str) + " - " + df["PRICES"].astype(str)
+    )
+
+    def with_default(column, default):
+        return df[column].where(df[column].astype(bool), default)
+
+    metadata = pd.DataFrame({
+        "name": with_default("STYLE NAME", "Unknown"),
+        "description": with_default("DESCRIPTION", "No description"),
+        "price": with_default("PRICES", "N/A"),
+        "fabric": with_default("FABRIC DESCRIPTION", "Unknown"),
+    }).to_dict("records")
+    return df["STYLE NUMBER"].tolist(), texts.tolist(), metadata
+
+def load_products(path=SHEET_PATH):
+    """Products as {style number: metadata} (same fields as the vector index metadata); last row wins on duplicates."""
+    ids, _, metadata = build_records(load_sheet(path))
+    return dict(zip(ids, metadata))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect the columnar catalog snapshot.")
+    parser.add_argument("--sheet", default=SHEET_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="rebuild even if the sheet is unchanged")
+    args = parser.parse_args()
+    if args.rebuild:
+        build_snapshot(args.sheet)
+    start_time = time.time()
+    snapshot = open_snapshot(args.sheet)
+    print(f"⏱️ Opened {len(snapshot)} styles in {(time.time() - start_time) * 1000:.1f} ms from {snapshot.directory}")
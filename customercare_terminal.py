@@ -1,10 +1,9 @@
 import os
 import openai
-import pinecone
-from pinecone import Pinecone
 from dotenv import load_dotenv
 import pandas as pd
-from sentence_transformers import SentenceTransformer
+import embedding_models
+import retrieval_service
 
 # Load environment variables
 load_dotenv()
@@ -12,11 +11,10 @@ load_dotenv()
 # Initialize OpenAI client
 client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-# Initialize Pinecone properly
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-
-# Access Pinecone index
-pinecone_index = pc.Index(name="vasavi")
+# Product index embedded with the local MiniLM model (no embedding round trip), built with
+# `python dataset_index.py --index vasavi-minilm`; until then lookups fall back to the OpenAI-embedded index
+PRODUCT_INDEX = embedding_models.LOCAL_INDEX
+product_index = retrieval_service.populated_index(PRODUCT_INDEX)
 
 # Load return & refund policy
 try: 
@@ -61,27 +59,20 @@ def query_policy_llm(user_query):
 
     return response.choices[0].message.content
 
-# Load embedding model
-embedding_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-
-# Function to get product info from Pinecone
+# Function to get product info through the shared retrieval service
 def get_product_info(user_query):
     try:
-        query_vector = embedding_model.encode(user_query).tolist()
-        search_result = pinecone_index.query(vector=query_vector, top_k=3, include_metadata=True)
-
-        if search_result and "matches" in search_result:
-            products = search_result["matches"]
-            if products:
-                return "\n".join(
-                    [
-                        f"✨ **{p['metadata'].get('name', 'Unknown Product')}** 🛍️\n"
-                        f"📝 {p['metadata'].get('description', 'No description available')}\n"
-                        f"💰 Price: ₹{p['metadata'].get('price', 'N/A')} 💸\n"
-                        f"🧵 Fabric: {p['metadata'].get('fabric', 'Unknown')}\n"
-                        for p in products
-                    ]
-                )  
+        products = retrieval_service.search(user_query, 3, product_index.get())
+        if products:
+            return "\n".join(
+                [
+                    f"✨ **{p.name}** 🛍️\n"
+                    f"📝 {p.description}\n"
+                    f"💰 Price: ₹{p.price} 💸\n"
+                    f"🧵 Fabric: {p.fabric}\n"
+                    for p in products
+                ]
+            )  
         return "Oopsie! 😢 No matching products found. Try searching for something else! 🛍️"
     except Exception as e:
         return f"Uff, technical glitch! 🤯 Error: {str(e)}"
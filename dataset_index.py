@@ -1,9 +1,17 @@
 import pandas as pd
-from pinecone import Pinecone
 import openai
 import time
+import json
+import random
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from dotenv import load_dotenv
+import vector_store
+import embedding_models
+import catalog
+from catalog import build_records
 import os
 import numpy as np
 
@@ -13,88 +21,293 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 
 PINECONE_ENV = "us-east-1"
-PINECONE_INDEX_NAME = "vasavi"
+PINECONE_INDEX_NAME = "vasavi"  # default --index; its embedding model comes from embedding_models.INDEXES
 
-# Validate API Keys
-if not OPENAI_API_KEY or not PINECONE_API_KEY:
-    raise ValueError("❌ Missing API keys. Check .env file!")
+file_path = catalog.SHEET_PATH
+retry_file_path = "dataset_index_failed.csv"  # rows that failed, re-run with --retry-failed
+state_path = "dataset_index_state.json"  # STYLE NUMBER -> hashes of what is in the index (other indexes: .<name>.json)
+
+# ✅ Upload settings (override through environment variables)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "512"))  # the embeddings API takes up to 2048 inputs per request
+EMBED_MAX_BATCH_TOKENS = int(os.getenv("EMBED_MAX_BATCH_TOKENS", "250000"))  # API limit is 300k tokens per request
+UPSERT_BATCH_SIZE = int(os.getenv("PINECONE_UPSERT_BATCH_SIZE", "100"))
+UPSERT_WORKERS = int(os.getenv("PINECONE_UPSERT_WORKERS", "4"))
+DELETE_BATCH_SIZE = 1000  # Pinecone's limit on ids per delete request
+MAX_RETRIES = int(os.getenv("INDEX_MAX_RETRIES", "6"))
+RETRY_BASE_SECONDS = float(os.getenv("INDEX_RETRY_BASE_SECONDS", "1"))
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Wrong key, no access or unknown model: every later request fails the same way, so the run stops
+FATAL_ERRORS = (openai.AuthenticationError, openai.PermissionDeniedError, openai.NotFoundError)
 
 # Initialize OpenAI API
 openai.api_key = OPENAI_API_KEY
 
-# Initialize Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
+def check_api_keys(model):
+    # OpenAI is only needed for remote embedding models, Pinecone only for the hosted store
+    needs_openai = embedding_models.MODELS[model]["provider"] == "openai"
+    if (needs_openai and not OPENAI_API_KEY) or (vector_store.requires_pinecone_key() and not PINECONE_API_KEY):
+        raise ValueError("❌ Missing API keys. Check .env file!")
 
-# Check if Pinecone index exists
-if PINECONE_INDEX_NAME not in pc.list_indexes().names():
-    print(f"⚠️ Pinecone index '{PINECONE_INDEX_NAME}' not found. Creating a new one...")
-    pc.create_index(name=PINECONE_INDEX_NAME, dimension=384, metric="cosine")
-    time.sleep(10)  # Wait for the index to initialize
+def connect_index(index_name=PINECONE_INDEX_NAME):
+    # Pinecone, or the local store with VECTOR_STORE=local; created if missing at the registered dimension
+    return embedding_models.open_index(index_name, create=True)
 
-index = pc.Index(PINECONE_INDEX_NAME)
+def load_dataset(path=file_path):
+    return catalog.load_sheet(path)
 
-# Load dataset
-file_path = "vasavi_quantities_sheet.xlsx"
-if not os.path.exists(file_path):
-    raise FileNotFoundError(f"❌ File '{file_path}' not found!")
+# ✅ Retry with exponential backoff for rate limits & transient server errors
+def is_retryable(error):
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    return isinstance(error, RETRYABLE_ERRORS) or status in RETRYABLE_STATUS
 
-df = pd.read_excel(file_path)
+def with_retries(call, description):
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = RETRY_BASE_SECONDS * 2 ** attempt * random.uniform(0.5, 1.0)
+            print(f"⏳ {description} failed ({type(e).__name__}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
 
-# Rename columns properly
-expected_columns = [
-    "S.NO", "STYLE IMAGE", "NaN1", "STYLE NAME", "NaN2", "STYLE NUMBER",
-    "DESCRIPTION", "PRICES", "FABRIC DESCRIPTION", "XS", "S", "M", "L", "XL", "TOTAL"
-]
-if len(df.columns) < len(expected_columns):
-    raise ValueError("❌ Excel file format mismatch. Check column names!")
+def estimate_tokens(text):
+    return len(text) // 3 + 1  # conservative; product texts are short
 
-df.columns = expected_columns
+def embedding_batches(texts, batch_size=EMBED_BATCH_SIZE, max_tokens=EMBED_MAX_BATCH_TOKENS):
+    """Splits row positions into batches that stay under both the input-count and the token limit."""
+    batch, tokens = [], 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if batch and (len(batch) >= batch_size or tokens + cost > max_tokens):
+            yield batch
+            batch, tokens = [], 0
+        batch.append(i)
+        tokens += cost
+    if batch:
+        yield batch
 
-# Drop unnecessary columns
-df = df.drop(columns=["NaN1", "NaN2", "STYLE IMAGE"]).iloc[1:].reset_index(drop=True)
+def embed_texts(texts, model):
+    return with_retries(lambda: embedding_models.embed_texts(texts, model), f"Embedding batch of {len(texts)}")
 
-# Handle missing values
-df.fillna("", inplace=True)
-df["STYLE NUMBER"] = df["STYLE NUMBER"].astype(str).str.strip()
-df["PRICES"] = df["PRICES"].astype(str).str.strip()
-df = df[df["STYLE NUMBER"] != ""]  # Remove rows without style number
-
-# Function to get embeddings using text-embedding-3-small
-def get_embedding(text):
+def embed_rows(texts, rows, failures, model):
+    """Embeds texts[rows]; a batch rejected as a bad request (400) is split in half until the offending rows are
+    isolated, any other failure fails the whole batch and auth / permission / model errors abort the run."""
     try:
-        response = openai.embeddings.create(
-            input=text,
-            model="text-embedding-3-small"
-        )
-        return response.data[0].embedding  # Extract vector
+        return list(zip(rows, embed_texts([texts[i] for i in rows], model)))
+    except FATAL_ERRORS as e:
+        raise RuntimeError(f"❌ Embedding with {model} is not possible, stopping the upload: {e}") from e
     except Exception as e:
-        print(f"⚠️ Error generating embedding: {e}")
-        return None
+        if len(rows) > 1 and isinstance(e, openai.BadRequestError):
+            middle = len(rows) // 2
+            return embed_rows(texts, rows[:middle], failures, model) + embed_rows(texts, rows[middle:], failures, model)
+        for i in rows:
+            failures[i] = ("embedding", str(e))
+        return []
 
-# Upload data to Pinecone
-failed_entries = []
-for _, row in tqdm(df.iterrows(), total=df.shape[0], desc="🚀 Uploading to Pinecone"):
-    try:
-        product_id = row["STYLE NUMBER"]
-        product_text = f"{row['STYLE NAME']} - {row['DESCRIPTION']} - {row['FABRIC DESCRIPTION']} - {row['PRICES']}"
-
-        embedding = get_embedding(product_text)
-        if embedding:
-            metadata = {
-                "name": row["STYLE NAME"] or "Unknown",
-                "description": row["DESCRIPTION"] or "No description",
-                "price": row["PRICES"] or "N/A",
-                "fabric": row["FABRIC DESCRIPTION"] or "Unknown"
-            }
-            index.upsert([(product_id, embedding, metadata)])
-        else:
-            failed_entries.append(product_id)
+def upsert_chunk(index, vectors):
+    with_retries(lambda: index.upsert(vectors=vectors), f"Upsert of {len(vectors)} vectors")
+    return len(vectors)
+
+def write_retry_file(df, failures, path=retry_file_path):
+    """Writes failed rows (with stage & error) for a later --retry-failed run; clears it when nothing failed."""
+    if not failures:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    rows = sorted(failures)
+    failed = df.iloc[rows].copy()
+    failed["FAILED STAGE"] = [failures[i][0] for i in rows]
+    failed["ERROR"] = [failures[i][1] for i in rows]
+    tmp_path = f"{path}.tmp"
+    failed.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def upload(df, index, model):
+    """Embeds rows in large batches and upserts them in chunks on a bounded worker pool. Returns {row: (stage, error)}."""
+    ids, texts, metadata = build_records(df)
+    failures = {}
+
+    progress = tqdm(total=len(ids), desc="🚀 Uploading to the product index")
+    with ThreadPoolExecutor(max_workers=UPSERT_WORKERS) as pool:
+        pending = {}
+        for rows in embedding_batches(texts):
+            embedded = embed_rows(texts, rows, failures, model)
+            progress.update(len(rows) - len(embedded))
 
+            # Upserts run in the background while the next batch is embedded
+            for start in range(0, len(embedded), UPSERT_BATCH_SIZE):
+                chunk = embedded[start:start + UPSERT_BATCH_SIZE]
+                vectors = [{"id": ids[i], "values": values, "metadata": metadata[i]} for i, values in chunk]
+                pending[pool.submit(upsert_chunk, index, vectors)] = [i for i, _ in chunk]
+
+            # Keep a bounded number of upserts in flight
+            while len(pending) > UPSERT_WORKERS * 2:
+                pending = _drain(pending, failures, progress, wait_all=False)
+        _drain(pending, failures, progress, wait_all=True)
+    progress.close()
+    return failures
+
+def _drain(pending, failures, progress, wait_all):
+    remaining = dict(pending)
+    for future in as_completed(pending):
+        rows = remaining.pop(future)
+        try:
+            future.result()
+        except Exception as e:
+            print(f"❌ Upsert of {len(rows)} rows failed: {e}")
+            for i in rows:
+                failures[i] = ("upsert", str(e))
+        progress.update(len(rows))
+        if not wait_all:
+            break
+    return remaining
+
+# ✅ Incremental state: what was last indexed for each style
+def content_hash(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+def state_path_for(index_name):
+    if index_name == PINECONE_INDEX_NAME:
+        return state_path
+    return f"{os.path.splitext(state_path)[0]}.{index_name}.json"
+
+def load_state(index_name, model):
+    """Returns {style number: {"text": hash, "metadata": hash}}; empty (= full reindex) when the index or model changed."""
+    path = state_path_for(index_name)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            state = json.load(f)
     except Exception as e:
-        print(f"❌ Error processing {row['STYLE NAME']} ({product_id}): {e}")
-        failed_entries.append(product_id)
+        print(f"⚠️ Could not read '{path}', re-indexing everything: {e}")
+        return {}
+    if (state.get("index"), state.get("model"), state.get("backend", "pinecone")) != (index_name, model, vector_store.VECTOR_STORE):
+        print("⚠️ Index, embedding model or vector store changed since the last run, re-indexing everything")
+        return {}
+    return state.get("styles", {})
+
+def save_state(styles, index_name, model):
+    path = state_path_for(index_name)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(
+            {"version": 1, "index": index_name, "model": model, "backend": vector_store.VECTOR_STORE, "styles": styles},
+            f, indent=1, sort_keys=True,
+        )
+    os.replace(tmp_path, path)
+
+def plan_changes(ids, texts, metadata, state):
+    """Splits rows into (re-embed rows, metadata-only rows, removed style numbers) against the last run."""
+    changed_rows, metadata_rows = [], []
+    for i, style in enumerate(ids):
+        previous = state.get(style)
+        if previous is None or previous["text"] != content_hash(texts[i]):
+            changed_rows.append(i)
+        elif previous["metadata"] != content_hash(metadata[i]):
+            metadata_rows.append(i)
+    removed = sorted(set(state) - set(ids))
+    return changed_rows, metadata_rows, removed
+
+def update_metadata(index, updates):
+    """Sends set_metadata updates ({id: metadata}) on the worker pool; returns {id: error} for the ones that failed."""
+    def update(style):
+        with_retries(lambda: index.update(id=style, set_metadata=updates[style]), f"Metadata update of {style}")
+
+    failures = {}
+    with ThreadPoolExecutor(max_workers=UPSERT_WORKERS) as pool:
+        futures = {pool.submit(update, style): style for style in updates}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="📝 Updating metadata"):
+            try:
+                future.result()
+            except Exception as e:
+                failures[futures[future]] = str(e)
+    return failures
+
+def delete_styles(index, styles):
+    """Deletes vectors of styles that left the sheet; returns the ones actually deleted."""
+    deleted = []
+    for start in range(0, len(styles), DELETE_BATCH_SIZE):
+        chunk = styles[start:start + DELETE_BATCH_SIZE]
+        try:
+            with_retries(lambda: index.delete(ids=chunk), f"Delete of {len(chunk)} styles")
+            deleted.extend(chunk)
+        except Exception as e:
+            print(f"❌ Could not delete {len(chunk)} removed styles: {e}")
+    return deleted
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed the product sheet and upload it to the product index (Pinecone or local).")
+    parser.add_argument("--retry-failed", action="store_true", help=f"only re-upload the rows listed in {retry_file_path}")
+    parser.add_argument("--full", action="store_true", help="ignore the saved state and re-index every row")
+    parser.add_argument("--index", default=PINECONE_INDEX_NAME, choices=sorted(embedding_models.INDEXES),
+                        help="target index; each one is embedded with its registered model")
+    args = parser.parse_args()
+    model = embedding_models.model_for(args.index)
+    check_api_keys(model)
+
+    df = load_dataset()
+    # A style number listed twice ends up as its last row, same as sequential upserts would leave it
+    df = df.drop_duplicates("STYLE NUMBER", keep="last").reset_index(drop=True)
+    if args.retry_failed:
+        if not os.path.exists(retry_file_path):
+            print(f"✅ No '{retry_file_path}' found, nothing to retry.")
+            return
+        failed_ids = set(pd.read_csv(retry_file_path, dtype=str)["STYLE NUMBER"].str.strip())
+        df = df[df["STYLE NUMBER"].isin(failed_ids)].reset_index(drop=True)
+        print(f"🔁 Retrying {len(df)} previously failed rows")
+
+    state = {} if args.full else load_state(args.index, model)
+    ids, texts, metadata = build_records(df)
+    changed_rows, metadata_rows, removed = plan_changes(ids, texts, metadata, state)
+    if args.retry_failed:
+        removed = []  # only part of the sheet was loaded
+        changed_rows = list(range(len(ids)))  # re-upserted in full, metadata included
+        metadata_rows = []
+    print(f"🧮 {len(ids)} styles: {len(changed_rows)} new or changed, {len(metadata_rows)} metadata-only, "
+          f"{len(ids) - len(changed_rows) - len(metadata_rows)} unchanged, {len(removed)} removed")
+    if not (changed_rows or metadata_rows or removed):
+        print("✅ Index is up to date, nothing to upload.")
+        return
+
+    index = connect_index(args.index)
+    start = time.perf_counter()
+
+    with vector_store.bulk(index):
+        # Re-embed only rows whose text changed
+        embed_df = df.iloc[changed_rows].reset_index(drop=True)
+        failures = upload(embed_df, index, model) if changed_rows else {}
+        failed_styles = {embed_df["STYLE NUMBER"][i] for i in failures}
+
+        # Text unchanged: keep the vector, just patch the metadata
+        metadata_failures = update_metadata(index, {ids[i]: metadata[i] for i in metadata_rows}) if metadata_rows else {}
+        for style, error in metadata_failures.items():
+            print(f"❌ Metadata update of {style} failed: {error}")
+        # Failed rows by position in df, whichever stage they failed in
+        failures = {changed_rows[i]: failure for i, failure in failures.items()}
+        failures.update({i: ("metadata", metadata_failures[ids[i]]) for i in metadata_rows if ids[i] in metadata_failures})
+
+        deleted = delete_styles(index, removed)
+
+    # Only record what actually reached the index, so failed rows are picked up again next run
+    for i in changed_rows + metadata_rows:
+        if ids[i] not in failed_styles and ids[i] not in metadata_failures:
+            state[ids[i]] = {"text": content_hash(texts[i]), "metadata": content_hash(metadata[i])}
+    for style in deleted:
+        state.pop(style, None)
+    save_state(state, args.index, model)
+
+    write_retry_file(df, failures)
+    uploaded = len(changed_rows) - len(failed_styles)
+    print(f"⏱️ Uploaded {uploaded} rows, updated {len(metadata_rows) - len(metadata_failures)}, "
+          f"deleted {len(deleted)} in {time.perf_counter() - start:.1f}s")
+    if failures:
+        print(f"⚠️ {len(failures)} entries failed to upload; written to '{retry_file_path}' (re-run with --retry-failed)")
 
-if failed_entries:
-    print(f"⚠️ {len(failed_entries)} entries failed to upload: {failed_entries}")
+    print("✅ Task completed successfully!")
 
-print("✅ Task completed successfully!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import os
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+
+# ✅ Cache settings (override through environment variables)
+MEMORY_ITEMS = int(os.getenv("EMBED_CACHE_SIZE", "1024"))
+DB_PATH = os.getenv("EMBED_CACHE_DB", ".embedding_cache.sqlite")
+DISK_ITEMS = int(os.getenv("EMBED_CACHE_DISK_ITEMS", "50000"))  # 0 disables the SQLite tier
+TTL_SECONDS = float(os.getenv("EMBED_CACHE_TTL_DAYS", "30")) * 86400
+
+def normalize_query(text):
+    """'  Black   KURTA ' and 'black kurta' share an entry."""
+    return " ".join(unicodedata.normalize("NFKC", str(text)).lower().split())
+
+def cache_key(text, model):
+    return hashlib.sha256(f"{model}\0{normalize_query(text)}".encode()).hexdigest()
+
+class EmbeddingCache:
+    """Query text -> embedding: a bounded in-memory LRU in front of a SQLite table shared by every process.
+
+    Entries expire `ttl_seconds` after they were computed; the table is pruned to `disk_items` rows,
+    least recently used first.
+    """
+
+    def __init__(self, memory_items=MEMORY_ITEMS, db_path=DB_PATH, disk_items=DISK_ITEMS, ttl_seconds=TTL_SECONDS):
+        self.memory_items = memory_items
+        self.db_path = db_path if disk_items > 0 else None
+        self.disk_items = disk_items
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (vector, created)
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_writes = 0
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0}
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, model TEXT, vector BLOB, created REAL, accessed REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _fresh(self, created):
+        return self.ttl_seconds <= 0 or time.time() - created < self.ttl_seconds
+
+    def _remember(self, key, vector, created):
+        self._entries[key] = (vector, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.memory_items:
+            self._entries.popitem(last=False)
+
+    def get(self, text, model):
+        key = cache_key(text, model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._fresh(entry[1]):
+                    self._entries.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return entry[0]
+                del self._entries[key]
+                self.counters["expired"] += 1
+
+            row = self._read_disk(key)
+            if row is not None and not self._fresh(row[1]):
+                self.counters["expired"] += 1
+                row = None
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["disk_hits"] += 1
+            self._remember(key, *row)
+            return row[0]
+
+    def put(self, text, model, vector):
+        key = cache_key(text, model)
+        vector = np.asarray(vector, dtype=np.float32)
+        created = time.time()
+        with self._lock:
+            self._remember(key, vector, created)
+            self._write_disk(key, model, vector, created)
+
+    def get_or_compute(self, text, model, compute):
+        """Cached embedding as a list of floats, or compute(text) (stored when not None)."""
+        vector = self.get(text, model)
+        if vector is None:
+            vector = compute(text)
+            if vector is None:
+                return None
+            self.put(text, model, vector)
+        return np.asarray(vector, dtype=np.float32).tolist()
+
+    def _read_disk(self, key):
+        if not self.db_path:
+            return None
+        try:
+            db = self._connection()
+            row = db.execute("SELECT vector, created FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE embeddings SET accessed = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            return np.frombuffer(row[0], dtype=np.float32).copy(), row[1]
+        except sqlite3.Error as e:
+            print(f"⚠️ Embedding cache read failed: {e}")
+            return None
+
+    def _write_disk(self, key, model, vector, created):
+        if not self.db_path:
+            return
+        try:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, model, vector.tobytes(), created, created),
+            )
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Embedding cache write failed: {e}")
+            return
+        self._disk_writes += 1
+        if self._disk_writes % 100 == 0:
+            # The embedding is already computed and stored; a failed prune (e.g. "database is locked") must not
+            # fail the query, the next prune catches up
+            try:
+                self._prune_locked()
+            except sqlite3.Error as e:
+                print(f"⚠️ Embedding cache prune failed: {e}")
+
+    def _prune_locked(self):
+        db = self._connection()
+        removed = db.execute("DELETE FROM embeddings WHERE created < ?", (time.time() - self.ttl_seconds,)).rowcount if self.ttl_seconds > 0 else 0
+        excess = db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.disk_items
+        if excess > 0:
+            removed += db.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY accessed LIMIT ?)", (excess,)
+            ).rowcount
+        db.commit()
+        return removed
+
+    def prune_disk(self):
+        """Drops expired rows and the least recently used ones beyond the configured bound."""
+        if not self.db_path:
+            return 0
+        with self._lock:
+            try:
+                return self._prune_locked()
+            except sqlite3.Error as e:
+                print(f"⚠️ Embedding cache prune failed: {e}")
+                return 0
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            counters["memory_items"] = len(self._entries)
+            if self.db_path and os.path.exists(self.db_path):
+                try:
+                    counters["disk_items"] = self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        counters["hit_rate"] = (counters["memory_hits"] + counters["disk_hits"]) / lookups if lookups else 0.0
+        return counters
+
+# Shared by every product lookup (retrieval_service) and the embedding model registry
+query_embeddings = EmbeddingCache()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or prune the query-embedding cache.")
+    parser.add_argument("--prune", action="store_true", help="drop expired and excess entries now")
+    args = parser.parse_args()
+    if args.prune:
+        print(f"🧹 Removed {query_embeddings.prune_disk()} cached embeddings")
+    print(f"📊 {query_embeddings.stats()}")
@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import openai
+from lazy_loader import lazy
+import vector_store
+from embedding_cache import query_embeddings
+
+# ✅ Embedding-model registry: every index is tied to exactly one model, and so to one dimension
+#   vasavi         - OpenAI text-embedding-3-small (remote), used by the text recommendation agents
+#   vasavi-minilm  - local SentenceTransformer MiniLM, no embedding round trip (customer care product lookups)
+MODELS = {
+    "text-embedding-3-small": {"provider": "openai", "dimension": 1536},
+    "sentence-transformers/all-MiniLM-L6-v2": {"provider": "sentence-transformers", "dimension": 384},
+}
+INDEXES = {
+    "vasavi": "text-embedding-3-small",
+    "vasavi-minilm": "sentence-transformers/all-MiniLM-L6-v2",
+}
+DEFAULT_INDEX = "vasavi"
+LOCAL_INDEX = os.getenv("LOCAL_EMBEDDING_INDEX", "vasavi-minilm")
+
+def model_for(index_name):
+    if index_name not in INDEXES:
+        raise ValueError(f"❌ Index '{index_name}' has no registered embedding model. Known: {', '.join(INDEXES)}.")
+    return INDEXES[index_name]
+
+def dimension_of(model):
+    if model not in MODELS:
+        raise ValueError(f"❌ Unknown embedding model '{model}'. Known: {', '.join(MODELS)}.")
+    return MODELS[model]["dimension"]
+
+def _load_sentence_transformer(model):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model)
+
+# Local models load on first use (lazy_loader warmup() picks them up too)
+_local_models = {
+    model: lazy(f"sentence_transformer:{model.split('/')[-1]}", lambda m=model: _load_sentence_transformer(m))
+    for model, spec in MODELS.items() if spec["provider"] == "sentence-transformers"
+}
+
+def embed_texts(texts, model, client=None, timeout=None):
+    """Embeds a batch of texts with `model`; returns one list of floats per text, in order.
+
+    `client` is an OpenAI client to send remote requests through (default: the openai module's own),
+    `timeout` caps that request in seconds.
+    """
+    dimension = dimension_of(model)
+    if MODELS[model]["provider"] == "openai":
+        options = {"timeout": timeout} if timeout else {}
+        response = (client or openai).embeddings.create(input=list(texts), model=model, **options)
+        vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    else:
+        vectors = np.asarray(_local_models[model].get().encode(list(texts)), dtype=np.float32).tolist()
+
+    if any(len(v) != dimension for v in vectors):
+        raise ValueError(f"❌ {model} returned vectors that are not {dimension}-d. Check the model registry.")
+    return vectors
+
+def embed_query(text, index_name=DEFAULT_INDEX, client=None, timeout=None):
+    """Query embedding from the model registered for `index_name`, served from the shared cache when repeated."""
+    model = model_for(index_name)
+    return query_embeddings.get_or_compute(text, model, lambda t: embed_texts([t], model, client, timeout)[0])
+
+def open_index(index_name=DEFAULT_INDEX, create=False, pool_threads=None):
+    """Opens `index_name` (Pinecone or local, per VECTOR_STORE) with its registered dimension enforced."""
+    return vector_store.open_index(
+        index_name, dimension=dimension_of(model_for(index_name)), create=create, pool_threads=pool_threads
+    )
@@ -0,0 +1,167 @@
+import os
+import json
+import numpy as np
+
+# ✅ Content-addressed embedding store kept as fixed-size .npy shards plus a checkpoint
+# Layout:
+#   embedding_shards/shard_00000.npy  (SHARD_SIZE x dim float32; only the newest shard may be shorter)
+#   embedding_shards/checkpoint.json  {"dim": 768, "source": {...}, "shards": [{"file": ..., "hashes": [...]}]}
+# "source" names what produced the vectors (model & embedder backend); a store built by anything else is
+# discarded, so one index never mixes vectors from different backends.
+# A shard is listed in the checkpoint only after it is fully on disk, so an interrupted build loses at most
+# one unflushed shard and the next run resumes by embedding whatever is missing.
+SHARD_SIZE = int(os.getenv("VIT_SHARD_SIZE", "1024"))
+CHECKPOINT_FILE = "checkpoint.json"
+
+class ShardedEmbeddingStore:
+    def __init__(self, directory, shard_size=SHARD_SIZE, source=None):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.source = source  # e.g. {"model": ..., "embedder": "onnx-int8"}; None = accept any store
+        self.dim = None
+        self.shards = []  # [{"file": name, "hashes": [...]}]
+        self.locations = {}  # content hash -> (shard index, row)
+        self._pending_hashes = []
+        self._pending_vectors = []
+        self._mapped = {}
+        self._load()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        path = self._path(CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r") as f:
+                checkpoint = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not read embedding checkpoint '{path}', starting over: {e}")
+            return
+        if self.source is not None and checkpoint.get("source") != self.source:
+            print(f"🔄 Embeddings in '{self.directory}' come from {checkpoint.get('source') or 'an unrecorded embedder'}, "
+                  f"not {self.source}; re-embedding everything")
+            self.shards = checkpoint.get("shards", [])
+            self.clear()
+            return
+        self.dim = checkpoint.get("dim")
+        for shard in checkpoint.get("shards", []):
+            if os.path.exists(self._path(shard["file"])):
+                self._register(shard)
+            else:
+                print(f"⚠️ Embedding shard '{shard['file']}' is missing; its images will be re-embedded.")
+
+    def _register(self, shard):
+        index = len(self.shards)
+        self.shards.append(shard)
+        for row, content_hash in enumerate(shard["hashes"]):
+            self.locations[content_hash] = (index, row)
+
+    def _write_checkpoint(self):
+        path = self._path(CHECKPOINT_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "dim": self.dim, "source": self.source, "shards": self.shards}, f)
+        os.replace(tmp_path, path)
+
+    def __contains__(self, content_hash):
+        return content_hash in self.locations
+
+    def __len__(self):
+        return len(self.locations)
+
+    def add(self, hashes, vectors):
+        """Buffers new embeddings; every full shard is written and checkpointed immediately."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        for content_hash, vector in zip(hashes, vectors):
+            if content_hash in self.locations:
+                continue
+            self._pending_hashes.append(content_hash)
+            self._pending_vectors.append(vector)
+            if len(self._pending_hashes) >= self.shard_size:
+                self.flush()
+
+    def _write_shard(self, name, vectors):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(f"{name}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(vectors, dtype=np.float32))
+        os.replace(tmp_path, self._path(name))
+
+    def flush(self):
+        """Writes buffered embeddings as a new shard and records it in the checkpoint."""
+        if not self._pending_hashes:
+            return
+        # Any unreferenced file with this name is a leftover from an interrupted run that never reached the checkpoint
+        taken = {shard["file"] for shard in self.shards}
+        number = len(self.shards)
+        while f"shard_{number:05d}.npy" in taken:
+            number += 1
+        name = f"shard_{number:05d}.npy"
+        self._write_shard(name, np.stack(self._pending_vectors))
+        self._register({"file": name, "hashes": list(self._pending_hashes)})
+        self._write_checkpoint()
+        self._pending_hashes.clear()
+        self._pending_vectors.clear()
+
+    def _shard_array(self, index):
+        if index not in self._mapped:
+            self._mapped[index] = np.load(self._path(self.shards[index]["file"]), mmap_mode="r")
+        return self._mapped[index]
+
+    def iter_vectors(self, hashes, chunk_size=4096):
+        """Yields float32 arrays for `hashes` (in order), read from memory-mapped shards chunk by chunk."""
+        self.flush()
+        for start in range(0, len(hashes), chunk_size):
+            chunk = hashes[start:start + chunk_size]
+            locations = np.array([self.locations[h] for h in chunk], dtype=np.int64).reshape(-1, 2)
+            out = np.empty((len(chunk), self.dim), dtype=np.float32)
+            for shard in np.unique(locations[:, 0]):
+                mask = locations[:, 0] == shard
+                out[mask] = self._shard_array(int(shard))[locations[mask, 1]]
+            yield out
+
+    def vectors(self, hashes):
+        return np.concatenate(list(self.iter_vectors(hashes))) if hashes else np.empty((0, self.dim or 0), np.float32)
+
+    def compact(self, live_hashes, max_stale_fraction=0.5):
+        """Rewrites the shards without embeddings of deleted images once they make up too much of the store."""
+        self.flush()
+        live = [h for h in self.locations if h in live_hashes]
+        stale = len(self.locations) - len(live)
+        if not self.locations or stale / len(self.locations) <= max_stale_fraction:
+            return 0
+
+        # Write the surviving embeddings to fresh shard files, then switch the checkpoint over to them
+        generation = os.urandom(3).hex()
+        old_files = [shard["file"] for shard in self.shards]
+        new_shards = []
+        for i, start in enumerate(range(0, len(live), self.shard_size)):
+            batch = live[start:start + self.shard_size]
+            name = f"shard_{i:05d}_{generation}.npy"
+            self._write_shard(name, self.vectors(batch))
+            new_shards.append({"file": name, "hashes": batch})
+
+        self._mapped.clear()
+        self.shards, self.locations = [], {}
+        for shard in new_shards:
+            self._register(shard)
+        self._write_checkpoint()
+        for name in old_files:
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+        return stale
+
+    def clear(self):
+        self._mapped.clear()
+        for shard in self.shards:
+            if os.path.exists(self._path(shard["file"])):
+                os.remove(self._path(shard["file"]))
+        self.shards, self.locations, self.dim = [], {}, None
+        self._pending_hashes.clear()
+        self._pending_vectors.clear()
+        if os.path.exists(self._path(CHECKPOINT_FILE)):
+            os.remove(self._path(CHECKPOINT_FILE))
@@ -1,31 +1,67 @@
+import io
 import os
 import numpy as np
-import faiss
-import torch
 from PIL import Image
-from transformers import AutoImageProcessor, ViTModel
 import openai
+import image_index
+from image_cache import ImageResultCache, cache_key
+from lazy_loader import lazy
+import vit_embedder
+from image_batcher import MicroBatcher, MICROBATCH
 
 # Initialize OpenAI API
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-# Load ViT Model
+# ViT Model, loaded on first image query (backend picked with VIT_EMBEDDER: torch / onnx / onnx-int8)
 model_name = "google/vit-base-patch16-224-in21k"
-feature_extractor = AutoImageProcessor.from_pretrained(model_name)  
-model = ViTModel.from_pretrained(model_name)
-model.eval()
+vit = lazy("vit_model", lambda: vit_embedder.get_embedder(name=model_name))
 
-# Load FAISS Index
+# FAISS Index (memory-mapped & shared across processes unless FAISS_MMAP=0)
 faiss_index_path = "cloth_faiss.index"
-if os.path.exists(faiss_index_path):
-    index = faiss.read_index(faiss_index_path)
-else:
-    raise FileNotFoundError(f"❌ FAISS index file '{faiss_index_path}' not found!")
 
 # Path to converted images directory
 converted_folder = "converted_images"
-if not os.path.exists(converted_folder):
-    raise FileNotFoundError(f"❌ Converted images directory '{converted_folder}' not found!")
+
+def check_catalog_files():
+    """Fails fast when the index, its id map or the converted images are missing (run vit_transformer.py)."""
+    image_index.check_index_files(faiss_index_path)
+    if not os.path.exists(converted_folder):
+        raise FileNotFoundError(
+            f"❌ Converted images directory '{converted_folder}' not found! Rebuild the index with vit_transformer.py."
+        )
+
+# Checked at import (server startup) rather than on the first upload; the index itself still loads lazily
+check_catalog_files()
+
+def _load_catalog_index():
+    check_catalog_files()
+    index = image_index.load_index(faiss_index_path)
+    image_index.configure_search(index)  # nprobe / efSearch for IVF & HNSW indexes
+
+    # Row id -> image path map written alongside the index
+    image_paths, product_keys = image_index.load_sidecar(faiss_index_path, expected_rows=index.ntotal)
+    return {
+        "index": index,
+        "image_paths": image_paths,
+        "product_keys": product_keys,
+        "aliases": image_index.load_aliases(faiss_index_path),  # near-duplicate shots collapsed at build time
+        "version": image_index.index_version(faiss_index_path),
+    }
+
+catalog_index = lazy("image_index", _load_catalog_index)
+
+# Cache of embeddings & results for repeat uploads, keyed by image bytes + index build
+result_cache = ImageResultCache()
+
+def _embed_and_search_batch(requests):
+    """One ViT forward pass and one FAISS search for a batch of (image, top_k) requests."""
+    images = [image for image, _ in requests]
+    embeddings = np.ascontiguousarray(vit.get().embed_images(images), dtype=np.float32)
+    _, indices = catalog_index.get()["index"].search(embeddings, max(top_k for _, top_k in requests))
+    return [(embeddings[i], indices[i][:top_k]) for i, (_, top_k) in enumerate(requests)]
+
+# Coalesces concurrent uploads (IMAGE_BATCH_MAX_SIZE / IMAGE_BATCH_MAX_WAIT_MS)
+query_batcher = MicroBatcher(_embed_and_search_batch, name="image-query-batcher")
 
 # System Prompt for OpenAI Agent
 SYSTEM_PROMPT = """
@@ -43,35 +79,74 @@ Make sure to:
 - NEVER suggest products from other brands or generic items.
 """
 
-def get_image_embedding(image_path):
-    """Extracts an embedding from an image using ViT."""
+# ✅ Image inputs: a file path, raw bytes, or a file-like object such as a Streamlit upload
+def read_image_bytes(image):
+    """Returns the encoded image bytes; uploads are used in place, only paths touch the disk."""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return image
+    if hasattr(image, "getbuffer"):  # BytesIO / Streamlit UploadedFile: no copy
+        return image.getbuffer()
+    if hasattr(image, "read"):
+        return image.read()
+    with open(image, "rb") as f:
+        return f.read()
+
+def _image_label(image):
+    return image if isinstance(image, (str, os.PathLike)) else getattr(image, "name", "uploaded image")
+
+def _decode_image(image_bytes):
+    return Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+def get_image_embedding(image):
+    """Extracts an embedding from an image (path, bytes or file-like object) using ViT."""
     try:
-        image = Image.open(image_path).convert("RGB")
-        inputs = feature_extractor(images=image, return_tensors="pt")
-        with torch.no_grad():
-            outputs = model(**inputs)
-            embedding = outputs.last_hidden_state[:, 0, :].squeeze(0)
-        return embedding.numpy()
+        return vit.get().embed_images([_decode_image(read_image_bytes(image))])[0]
     except Exception as e:
-        print(f"❌ Error processing {image_path}: {e}")
+        print(f"❌ Error processing {_image_label(image)}: {e}")
         return None
 
-def find_similar_images(input_image_path, top_k=5):
-    """Finds similar images in the FAISS index."""
-    embedding = get_image_embedding(input_image_path)
-    if embedding is None:
+def find_similar_images(image, top_k=5):
+    """Finds similar images in the FAISS index, reusing cached results for images seen before."""
+    catalog = catalog_index.get()
+    try:
+        image_bytes = read_image_bytes(image)
+        key = cache_key(image_bytes, catalog["version"])
+    except OSError as e:
+        print(f"❌ Error processing {_image_label(image)}: {e}")
         return []
 
-    embedding = np.expand_dims(embedding, axis=0)  # Reshape for FAISS
-    distances, indices = index.search(embedding, top_k)
+    cached = result_cache.get(key)
+    if cached is not None and cached["top_k"] >= top_k:
+        return cached["images"][:top_k]
+
+    if cached is None and MICROBATCH:
+        try:
+            embedding, hits = query_batcher.submit((_decode_image(image_bytes), top_k)).result()
+        except Exception as e:
+            print(f"❌ Error processing {_image_label(image)}: {e}")
+            return []
+    else:
+        embedding = cached["embedding"] if cached is not None else get_image_embedding(image_bytes)
+        if embedding is None:
+            return []
+        distances, indices = catalog["index"].search(np.expand_dims(embedding, axis=0), top_k)  # Reshape for FAISS
+        hits = indices[0]
 
     # Fetch corresponding image paths
-    image_files = sorted([os.path.join(converted_folder, f) for f in os.listdir(converted_folder) if f.endswith(".jpg")])
-    similar_images = [image_files[i] for i in indices[0] if i < len(image_files)]
+    similar_images = image_index.lookup(catalog["image_paths"], hits)
 
+    result_cache.put(key, embedding, similar_images, top_k)
     return similar_images
 
-def generate_friendly_response(image_path, similar_images):
+def image_aliases(image_path):
+    """Other shots of the same product that were collapsed into `image_path` when the index was built."""
+    return catalog_index.get()["aliases"].get(image_path, [])
+
+def cache_stats():
+    """Hit/miss counters for the uploaded-image cache."""
+    return result_cache.stats()
+
+def generate_friendly_response(image, similar_images):
     """Generates a friendly text response using OpenAI's LLM."""
     if not similar_images:
         return "I couldn't find any similar products right now. Maybe try a different image?"
@@ -101,11 +176,19 @@ def generate_friendly_response(image_path, similar_images):
         print(f"❌ OpenAI API Error: {e}")
         return "Sorry, I couldn't generate a recommendation message at the moment."
 
-def image_recommendation(input_image_path):
-    """Main function to get image recommendations and generate a text response."""
-    similar_images = find_similar_images(input_image_path)
-    text_response = generate_friendly_response(input_image_path, similar_images)
-    return {"text": text_response, "images": similar_images}
+def image_recommendation(image):
+    """Main function to get image recommendations and generate a text response.
+
+    `image` is a file path, raw bytes or a file-like object (e.g. a Streamlit upload); uploads never hit the disk.
+    "images" holds one image per product; "aliases" maps each to the other shots of it merged at build time.
+    """
+    similar_images = find_similar_images(image)
+    text_response = generate_friendly_response(image, similar_images)
+    return {
+        "text": text_response,
+        "images": similar_images,
+        "aliases": {image_path: image_aliases(image_path) for image_path in similar_images},
+    }
 
 if __name__ == "__main__":
     test_image = "test_img.png"  
@@ -0,0 +1,117 @@
+import os
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+
+# ✅ Batching settings (override through environment variables)
+MICROBATCH = os.getenv("IMAGE_MICROBATCH", "1") == "1"
+MAX_BATCH_SIZE = int(os.getenv("IMAGE_BATCH_MAX_SIZE", "8"))
+MAX_WAIT_MS = float(os.getenv("IMAGE_BATCH_MAX_WAIT_MS", "5"))
+
+class MicroBatcher:
+    """Coalesces concurrent requests into batches for `process_batch`.
+
+    The first request of a batch waits at most `max_wait_ms` for company; a batch is dispatched as soon as it
+    reaches `max_batch_size`. `process_batch(items)` must return one result per item, in order.
+    """
+
+    def __init__(self, process_batch, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS, name="microbatcher"):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.counters = {"requests": 0, "batches": 0}
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+
+    def submit(self, item):
+        """Queues one item and returns a Future for its result."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [(item, future) for item, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            self.counters["requests"] += len(batch)
+            self.counters["batches"] += 1
+            try:
+                results = self.process_batch([item for item, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def stats(self):
+        counters = dict(self.counters)
+        counters["mean_batch_size"] = counters["requests"] / counters["batches"] if counters["batches"] else 0.0
+        return counters
+
+# ✅ Throughput check: N concurrent shoppers, batch-of-one vs. coalesced
+def _benchmark(concurrency, requests_per_client, max_batch_size, max_wait_ms, backend):
+    from PIL import Image
+    import vit_embedder
+
+    embedder = vit_embedder.get_embedder(backend)
+    rng = np.random.default_rng(0)
+    images = [Image.fromarray((rng.random((256, 256, 3)) * 255).astype(np.uint8)) for _ in range(16)]
+    total = concurrency * requests_per_client
+
+    def run(embed_one):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(lambda i: embed_one(images[i % len(images)]), range(total)))
+        return total / (time.perf_counter() - start)
+
+    single_lock = threading.Lock()  # one model instance, so unbatched calls serialize on it
+
+    def embed_single(image):
+        with single_lock:
+            return embedder.embed_images([image])[0]
+
+    batcher = MicroBatcher(lambda batch: list(embedder.embed_images(batch)), max_batch_size, max_wait_ms)
+    run(embed_single)  # warm-up
+    unbatched = run(embed_single)
+    batched = run(batcher)
+    print(f"👥 {concurrency} concurrent clients, {total} requests ({backend})")
+    print(f"   batch-of-one: {unbatched:.1f} img/s")
+    print(f"   micro-batched (max {max_batch_size}, {max_wait_ms} ms): {batched:.1f} img/s, {batcher.stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure micro-batching throughput for the image path.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=8, help="requests per client")
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--backend", default=None)
+    args = parser.parse_args()
+    _benchmark(args.concurrency, args.requests, args.max_batch_size, args.max_wait_ms, args.backend)
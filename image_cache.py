@@ -0,0 +1,144 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# ✅ Cache settings (override through environment variables)
+MEMORY_ITEMS = int(os.getenv("IMAGE_CACHE_SIZE", "256"))
+DISK_DIR = os.getenv("IMAGE_CACHE_DIR", ".image_cache")
+# Off by default so uploads never touch the disk; set e.g. 5000 to share results across runs
+DISK_ITEMS = int(os.getenv("IMAGE_CACHE_DISK_ITEMS", "0"))  # 0 disables the disk tier
+
+def cache_key(image_bytes, index_version):
+    """Content address for an upload: the same bytes against the same index always share an entry."""
+    digest = hashlib.sha256(image_bytes)
+    digest.update(b"\0" + index_version.encode())
+    return digest.hexdigest()
+
+class ImageResultCache:
+    """Bounded LRU of {embedding, top_k, images} per uploaded image, optionally backed by a disk tier shared
+    across runs (IMAGE_CACHE_DISK_ITEMS > 0)."""
+
+    def __init__(self, memory_items=MEMORY_ITEMS, disk_dir=DISK_DIR, disk_items=DISK_ITEMS):
+        self.memory_items = memory_items
+        self.disk_dir = disk_dir if disk_items > 0 else None
+        self.disk_items = disk_items
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self._pruning = False
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.npz")
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.memory_items:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["disk_hits"] += 1
+            self._remember(key, entry)
+            return entry
+
+    def put(self, key, embedding, images, top_k):
+        entry = {"embedding": np.asarray(embedding, dtype=np.float32), "images": list(images), "top_k": top_k}
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                return {"embedding": data["embedding"], "images": meta["images"], "top_k": meta["top_k"]}
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Dropping unreadable cache entry {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+            np.savez(tmp_path, embedding=entry["embedding"], meta=np.array(json.dumps({"images": entry["images"], "top_k": entry["top_k"]})))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Could not write cache entry {path}: {e}")
+            return
+
+        # Pruning walks the whole cache directory, so it runs in the background, never inside a request
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % 100 == 0 and not self._pruning
+            if prune:
+                self._pruning = True
+        if prune:
+            threading.Thread(target=self._prune_in_background, name="image-cache-prune", daemon=True).start()
+
+    def _prune_in_background(self):
+        try:
+            self.prune_disk()
+        except Exception as e:
+            print(f"⚠️ Image cache pruning failed: {e}")
+        finally:
+            with self._lock:
+                self._pruning = False
+
+    def prune_disk(self):
+        """Drops the least recently written disk entries beyond the configured bound."""
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return 0
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith(".npz") and ".tmp" not in name:
+                    path = os.path.join(root, name)
+                    try:
+                        files.append((os.path.getmtime(path), path))
+                    except OSError:
+                        pass
+        excess = len(files) - self.disk_items
+        if excess <= 0:
+            return 0
+        for _, path in sorted(files)[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return excess
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            counters["memory_items"] = len(self._entries)
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        counters["hit_rate"] = (counters["memory_hits"] + counters["disk_hits"]) / lookups if lookups else 0.0
+        return counters
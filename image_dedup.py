@@ -0,0 +1,99 @@
+import os
+import re
+import numpy as np
+import faiss
+from PIL import Image
+from product_vocabulary import COLOURS
+
+# ✅ Near-duplicate settings (override through environment variables)
+# Two catalog images are near-duplicates when their ViT embeddings are close AND their perceptual hashes agree,
+# or when the embeddings alone are almost identical (crops and re-framings move the hash too much).
+DEDUP = os.getenv("VIT_DEDUP", "1") == "1"
+MIN_COSINE = float(os.getenv("VIT_DEDUP_MIN_COSINE", "0.90"))
+MAX_HAMMING = int(os.getenv("VIT_DEDUP_MAX_HAMMING", "10"))  # out of 64 dHash bits
+STRICT_COSINE = float(os.getenv("VIT_DEDUP_STRICT_COSINE", "0.98"))
+NEIGHBORS = int(os.getenv("VIT_DEDUP_NEIGHBORS", "16"))  # candidate neighbours checked per image
+# Colour variants and the same cut in another fabric look alike, so only shots of one style number (and colour,
+# when the path gives one) are ever merged: "VS-101_front.jpg", "vs101 back.png" and "VS-101/side.jpg" may be,
+# "VS-101_red.jpg" and "VS-101_blue.jpg" may not
+STYLE_NUMBER_PATTERN = re.compile(r"(?<![a-z0-9])([a-z]{1,4})[-_ ]?(\d{2,})(?![0-9])", re.IGNORECASE)
+# Camera and phone file names ("IMG_0001", "DSC00123", "PXL_2024...") number photos, not products
+CAMERA_PREFIXES = {"IMG", "DSC", "DSCN", "DSCF", "PXL", "MVIMG", "DJI", "GOPR", "SAM", "PIC", "PHOTO", "SCAN", "WA"}
+
+def style_key(image_path, root=None):
+    """Product key from an image's path below `root`: style number plus any colour words ('VS101', 'VS101:red').
+
+    The file name is tried first, then its folders (deepest first), so "VS-101/front.jpg" is VS101 too.
+    None when no part of the path carries a style number; such images are never merged with another.
+    """
+    relative = os.path.relpath(image_path, root) if root else image_path
+    parts = os.path.normpath(os.path.splitext(relative)[0]).split(os.sep)
+    for part in reversed(parts):
+        for match in STYLE_NUMBER_PATTERN.finditer(part):
+            if match.group(1).upper() in CAMERA_PREFIXES:
+                continue
+            colours = sorted(set(re.findall(r"[a-z]+", relative.lower())) & set(COLOURS))
+            return ":".join([f"{match.group(1)}{match.group(2)}".upper()] + colours)
+    return None
+
+def dhash(image, hash_size=8):
+    """64-bit difference hash as a hex string; unchanged by re-encoding, resizing and colour correction."""
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):0{hash_size * hash_size // 4}x}"
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+def _normalized(chunk):
+    chunk = np.array(chunk, dtype=np.float32, order="C")
+    faiss.normalize_L2(chunk)
+    return chunk
+
+def find_duplicate_groups(read_chunks, dim, hashes, keys, neighbors=NEIGHBORS, min_cosine=MIN_COSINE,
+                          max_hamming=MAX_HAMMING, strict_cosine=STRICT_COSINE):
+    """Clusters rows into near-duplicate groups.
+
+    `read_chunks()` returns an iterator over the embeddings in row order (called twice: to index, then to query),
+    `hashes[i]` is the dHash of row i and `keys[i]` its product / style key. Rows are only grouped with rows of the
+    same key; rows whose key is None are never grouped. Returns a list of groups (lists of row ids, size >= 2).
+    """
+    cosine_index = faiss.IndexFlatIP(dim)
+    for chunk in read_chunks():
+        cosine_index.add(_normalized(chunk))
+
+    # Accepted near-duplicate pairs, per row
+    edges = [[] for _ in range(cosine_index.ntotal)]
+    start = 0
+    k = min(neighbors + 1, cosine_index.ntotal)
+    for chunk in read_chunks():
+        similarities, indices = cosine_index.search(_normalized(chunk), k)
+        for offset, (row_sims, row_ids) in enumerate(zip(similarities, indices)):
+            i = start + offset
+            for sim, j in zip(row_sims, row_ids):
+                if j < 0 or j == i or sim < min_cosine or keys[i] is None or keys[i] != keys[j]:
+                    continue
+                if sim >= strict_cosine or hamming(hashes[i], hashes[j]) <= max_hamming:
+                    edges[i].append(int(j))
+        start += len(chunk)
+
+    # Leader clustering: every member is a direct near-duplicate of its group's first image, so groups can't
+    # chain A~B~C... into one cluster of distinct products
+    assigned = np.zeros(len(edges), dtype=bool)
+    groups = []
+    for i, neighbours in enumerate(edges):
+        if assigned[i]:
+            continue
+        assigned[i] = True
+        members = [i] + [j for j in neighbours if not assigned[j]]
+        assigned[members] = True
+        if len(members) > 1:
+            groups.append(members)
+    return groups
+
+def pick_representative(members, vectors):
+    """The member closest to all others (highest mean cosine), so the kept embedding stands for the whole group."""
+    vectors = _normalized(vectors)
+    # Mean cosine to the group equals the dot product with the group's mean vector
+    return members[int(np.argmax(vectors @ vectors.mean(axis=0)))]
@@ -0,0 +1,238 @@
+import os
+import json
+import math
+import numpy as np
+import faiss
+
+# ✅ Index settings (override through environment variables)
+INDEX_TYPES = ("flat", "ivf", "hnsw", "sq8", "fp16", "pq")
+INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat").lower()
+IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "0"))  # 0 = pick from catalog size
+NPROBE = int(os.getenv("FAISS_NPROBE", "8"))
+HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "80"))
+EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+MMAP_LOAD = os.getenv("FAISS_MMAP", "1") == "1"  # share index pages across processes instead of private copies
+PQ_M = int(os.getenv("FAISS_PQ_M", "64"))  # sub-quantizers; 64 x 8 bits = 64 bytes per 768-dim vector
+RERANK = os.getenv("FAISS_RERANK", "0") == "1"  # re-rank compressed hits against the exact vectors
+RERANK_K_FACTOR = int(os.getenv("FAISS_RERANK_K_FACTOR", "4"))
+
+def default_nlist(n_vectors):
+    """~4*sqrt(n) lists, capped so every list gets enough training points (FAISS wants ~39 per centroid)."""
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+def pq_params(d, n_vectors, m=None):
+    """Largest sub-quantizer count <= m that divides d, and a code size the catalog can train."""
+    m = max(1, min(m or PQ_M, d))
+    while d % m:
+        m -= 1
+    nbits = max(1, min(8, int(math.log2(max(n_vectors, 2)))))
+    return m, nbits
+
+def build_index(embeddings, index_type=None, nlist=None, hnsw_m=None, ef_construction=None, pq_m=None, rerank=None):
+    """Builds a Flat, IVF-Flat, HNSW or compressed (SQ8 / fp16 / PQ) L2 index over float32 embeddings.
+
+    With rerank, compressed indexes also keep the exact vectors and re-score the top candidates with them.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    n, d = embeddings.shape
+    return build_index_from_chunks([embeddings], d, n, embeddings, index_type, nlist, hnsw_m, ef_construction, pq_m, rerank)
+
+def build_index_from_chunks(chunks, d, n_vectors, train_vectors=None, index_type=None, nlist=None, hnsw_m=None,
+                            ef_construction=None, pq_m=None, rerank=None):
+    """Same as build_index, but adds vectors chunk by chunk so the full matrix never has to be in memory.
+
+    Index types that need training (IVF, SQ, PQ) are trained on `train_vectors`, a sample of the catalog.
+    """
+    index_type = (index_type or INDEX_TYPE).lower()
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(d)
+    elif index_type == "ivf":
+        nlist = nlist or IVF_NLIST or default_nlist(n_vectors)
+        quantizer = faiss.IndexFlatL2(d)
+        index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_L2)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(d, hnsw_m or HNSW_M, faiss.METRIC_L2)
+        index.hnsw.efConstruction = ef_construction or HNSW_EF_CONSTRUCTION
+    elif index_type in ("sq8", "fp16"):
+        qtype = faiss.ScalarQuantizer.QT_8bit if index_type == "sq8" else faiss.ScalarQuantizer.QT_fp16
+        index = faiss.IndexScalarQuantizer(d, qtype, faiss.METRIC_L2)
+    elif index_type == "pq":
+        m, nbits = pq_params(d, n_vectors, pq_m)
+        index = faiss.IndexPQ(d, m, nbits, faiss.METRIC_L2)
+    else:
+        raise ValueError(f"❌ Unknown index type '{index_type}'. Choose one of {', '.join(INDEX_TYPES)}.")
+
+    if (RERANK if rerank is None else rerank) and index_type in ("sq8", "fp16", "pq"):
+        index = faiss.IndexRefineFlat(index)
+        index.k_factor = RERANK_K_FACTOR
+
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(train_vectors, dtype=np.float32))
+
+    for chunk in chunks:
+        index.add(np.ascontiguousarray(chunk, dtype=np.float32))
+    return index
+
+def describe_index(index):
+    """Index type & build parameters, read back from the index itself."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexRefine):
+        info = describe_index(index.base_index)
+        info["rerank_k_factor"] = index.k_factor
+        return info
+    if isinstance(index, faiss.IndexHNSW):
+        return {"type": "hnsw", "M": index.hnsw.nb_neighbors(1), "efConstruction": index.hnsw.efConstruction}
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return {"type": "sq8" if index.sq.qtype == faiss.ScalarQuantizer.QT_8bit else "fp16"}
+    if isinstance(index, faiss.IndexPQ):
+        return {"type": "pq", "M": index.pq.M, "nbits": index.pq.nbits}
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return {"type": "ivf", "nlist": ivf.nlist}
+    return {"type": "flat"}
+
+def memory_per_item(index):
+    """Serialized bytes per stored vector, which is what a serving process holds in RAM."""
+    return len(faiss.serialize_index(index)) / max(1, index.ntotal)
+
+def configure_search(index, nprobe=None, ef_search=None, rerank_k_factor=None):
+    """Applies query-time knobs (IVF nprobe / HNSW efSearch / re-rank depth); a no-op for flat indexes."""
+    # Work on a downcast view but hand back the original object, which owns the index memory
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexRefine):
+        inner.k_factor = rerank_k_factor or RERANK_K_FACTOR
+        configure_search(inner.base_index, nprobe, ef_search)
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = ef_search or EF_SEARCH
+    else:
+        ivf = faiss.try_extract_index_ivf(inner)
+        if ivf is not None:
+            ivf.nprobe = min(nprobe or NPROBE, ivf.nlist)
+    return index
+
+# ✅ Loading & saving
+# Header (fourcc) of every index type build_index can produce
+KNOWN_FOURCCS = {b"IxF2", b"IxFI", b"IxFl", b"IwFl", b"IHNf", b"IxSQ", b"IxPq", b"IxRF"}
+MUTATING_METHODS = ("add", "add_with_ids", "train", "reset", "remove_ids", "merge_from", "update_vectors")
+
+def _read_only(name):
+    def refuse(*args, **kwargs):
+        raise RuntimeError(f"❌ Index is memory-mapped read-only; '{name}' is not allowed. Rebuild with vit_transformer.py instead.")
+    return refuse
+
+def load_index(path, mmap=None):
+    """Loads a saved index, memory-mapped and read-only by default.
+
+    Mapped pages come from the page cache, so every process on the host serving the same file shares them and
+    start-up no longer copies the whole index. Mutating a mapped index would abort the process inside FAISS,
+    so those methods raise instead.
+    """
+    mmap = MMAP_LOAD if mmap is None else mmap
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ FAISS index file '{path}' not found!")
+
+    with open(path, "rb") as f:
+        fourcc = f.read(4)
+    if fourcc not in KNOWN_FOURCCS:
+        raise ValueError(f"❌ '{path}' is not a supported FAISS index (header {fourcc!r}).")
+
+    if not mmap:
+        return faiss.read_index(path)
+
+    # IO_FLAG_MMAP_IFC maps flat code storage zero-copy; older FAISS builds only map inverted lists
+    flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+    try:
+        index = faiss.read_index(path, flags)
+    except RuntimeError as e:
+        print(f"⚠️ Memory-mapped load of '{path}' failed, reading it into memory instead: {e}")
+        return faiss.read_index(path)
+
+    for name in MUTATING_METHODS:
+        if hasattr(index, name):
+            setattr(index, name, _read_only(name))
+    return index
+
+def index_version(path):
+    """Identifies one build of the index; changes whenever vit_transformer.py replaces the file."""
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+def save_index(index, path):
+    """Writes atomically so processes that have the old file mapped keep a valid view."""
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+# Sidecar stored next to the FAISS index: row id -> converted image path & product key
+def sidecar_path(index_path):
+    return f"{os.path.splitext(index_path)[0]}_ids.npz"
+
+def product_key(image_path):
+    """Product key for a converted image, e.g. 'converted_images/VS-101_front.jpg' -> 'VS-101_front'."""
+    return os.path.splitext(os.path.basename(image_path))[0]
+
+def write_sidecar(index_path, image_paths, index_info=None, aliases=None):
+    """Writes the id map for an index whose row i holds the embedding of image_paths[i].
+
+    `aliases` maps an indexed image to the near-duplicates that were collapsed into it.
+    """
+    image_paths = [str(p) for p in image_paths]
+    path = sidecar_path(index_path)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(
+        tmp_path,
+        ids=np.arange(len(image_paths), dtype=np.int64),
+        paths=np.array(image_paths, dtype=str),
+        keys=np.array([product_key(p) for p in image_paths], dtype=str),
+        index_info=np.array(json.dumps(index_info or {})),
+        aliases=np.array(json.dumps(aliases or {})),
+    )
+    os.replace(tmp_path, path)
+    return path
+
+def check_index_files(index_path):
+    """Raises FileNotFoundError unless both the index and its id map exist (an index copied without its sidecar
+    can't map hits back to images)."""
+    if not os.path.exists(index_path):
+        raise FileNotFoundError(f"❌ FAISS index file '{index_path}' not found! Build it with vit_transformer.py.")
+    if not os.path.exists(sidecar_path(index_path)):
+        raise FileNotFoundError(
+            f"❌ FAISS index '{index_path}' has no id map ('{sidecar_path(index_path)}'), so its hits can't be "
+            "resolved to images. Rebuild the index with vit_transformer.py."
+        )
+
+def load_sidecar(index_path, expected_rows=None):
+    """Loads the id map once; returns (paths, keys) arrays indexed directly by FAISS row id."""
+    path = sidecar_path(index_path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ Index id map '{path}' not found! Rebuild the index with vit_transformer.py.")
+
+    with np.load(path) as data:
+        ids, paths, keys = data["ids"], data["paths"], data["keys"]
+
+    # Rows are normally stored in id order; scatter them if not
+    if not np.array_equal(ids, np.arange(len(ids))):
+        order = np.empty(ids.max() + 1, dtype=np.int64)
+        order.fill(-1)
+        order[ids] = np.arange(len(ids))
+        if (order < 0).any():
+            raise ValueError(f"❌ Index id map '{path}' has gaps in its ids!")
+        paths, keys = paths[order], keys[order]
+
+    if expected_rows is not None and len(paths) != expected_rows:
+        raise ValueError(
+            f"❌ Index id map '{path}' has {len(paths)} entries but the index holds {expected_rows} vectors. "
+            "Rebuild the index with vit_transformer.py."
+        )
+    return paths, keys
+
+def load_aliases(index_path):
+    """Indexed image -> near-duplicate images collapsed into it (empty for sidecars written before dedup)."""
+    with np.load(sidecar_path(index_path)) as data:
+        return json.loads(str(data["aliases"])) if "aliases" in data.files else {}
+
+def lookup(paths, indices):
+    """Resolves FAISS result ids to image paths, skipping the -1 padding FAISS uses for missing hits."""
+    return [str(paths[i]) for i in indices if 0 <= i < len(paths)]
@@ -0,0 +1,72 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ✅ Registry of heavy resources (models, indexes, API clients) loaded on first use
+_resources = {}
+_registry_lock = threading.Lock()
+
+class LazyResource:
+    """Runs `factory` once, on the first get(), even when several threads ask at the same time."""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded = False
+        self.load_seconds = None
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                self._value = self._factory()
+                self.load_seconds = time.perf_counter() - start
+                self._loaded = True
+                print(f"⏱️ Loaded {self.name} in {self.load_seconds:.2f}s")
+        return self._value
+
+def lazy(name, factory):
+    """Registers a resource under `name` and returns its LazyResource handle."""
+    with _registry_lock:
+        if name not in _resources:
+            _resources[name] = LazyResource(name, factory)
+        return _resources[name]
+
+def startup_report():
+    """Load time in seconds per component (None for components not loaded yet)."""
+    with _registry_lock:
+        return {name: resource.load_seconds for name, resource in _resources.items()}
+
+def warmup(names=None, max_workers=None):
+    """Loads the given (default: all registered) resources in parallel and reports per-component timing."""
+    with _registry_lock:
+        targets = [r for n, r in _resources.items() if names is None or n in names]
+    if not targets:
+        return {}
+
+    print(f"🔥 Warming up {len(targets)} components...")
+    start = time.perf_counter()
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(targets)) as pool:
+        futures = {pool.submit(resource.get): resource.name for resource in targets}
+        for future, name in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                errors[name] = e
+                print(f"❌ Failed to load {name}: {e}")
+
+    report = {resource.name: resource.load_seconds for resource in targets}
+    for name, seconds in sorted(report.items(), key=lambda item: -(item[1] or 0)):
+        status = f"{seconds:.2f}s" if seconds is not None else f"failed ({errors.get(name)})"
+        print(f"   • {name}: {status}")
+    print(f"✅ Warmup finished in {time.perf_counter() - start:.2f}s")
+    return report
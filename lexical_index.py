@@ -0,0 +1,89 @@
+import re
+import math
+from collections import Counter, defaultdict
+
+# ✅ In-process BM25 over product fields, plus exact style-number / style-name lookup
+FIELD_WEIGHTS = {"name": 2, "description": 1, "fabric": 1}  # a term in the style name counts twice
+K1 = 1.2
+B = 0.75
+# A bare number ("under 2000", "size 12") is a price or a size; it only names a style after one of these cues
+STYLE_NUMBER_CUE = re.compile(r"(?:style(?:\s*(?:no|number|code))?|sku|item|#)\s*[:#.]?\s*(\d+)\b")
+
+def tokenize(text):
+    return re.findall(r"[a-z0-9]+", str(text).lower())
+
+def compact(text):
+    """'VS-101', 'vs 101' and 'VS101' all compact to 'vs101'."""
+    return "".join(tokenize(text))
+
+class BM25Index:
+    def __init__(self, products, field_weights=FIELD_WEIGHTS):
+        """`products` maps product id -> dict with the fields in `field_weights`."""
+        self.ids = list(products)
+        self.postings = defaultdict(list)  # term -> [(doc, term frequency)]
+        self.doc_lengths = []
+        self.by_style_number = {}
+        self.by_name = defaultdict(list)
+
+        for doc, product_id in enumerate(self.ids):
+            product = products[product_id]
+            counts = Counter()
+            for field, weight in field_weights.items():
+                for term in tokenize(product.get(field, "")):
+                    counts[term] += weight
+            for term, tf in counts.items():
+                self.postings[term].append((doc, tf))
+            self.doc_lengths.append(sum(counts.values()))
+
+            self.by_style_number[compact(product_id)] = product_id
+            name = " ".join(tokenize(product.get("name", "")))
+            if name and name != "unknown":
+                self.by_name[name].append(product_id)
+
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        n = len(self.ids)
+        self.idf = {term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5)) for term, docs in self.postings.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def exact_matches(self, query):
+        """Products named by the query outright: a style number anywhere in it, or the whole query being a style name."""
+        tokens = tokenize(query)
+        # Style numbers may be typed with or without separators, so try single tokens and adjacent pairs / triples
+        candidates = [compact(query)] + tokens + ["".join(tokens[i:i + n]) for n in (2, 3) for i in range(len(tokens) - n + 1)]
+        # A style code carries both letters and digits ("VS-101"), so neither "top" nor "2000" counts as one
+        codes = [c for c in candidates if len(c) >= 3 and any(ch.isdigit() for ch in c) and any(ch.isalpha() for ch in c)]
+        # Numeric-only style numbers count only when the query introduces them ("style 1042", "#1042")
+        codes += STYLE_NUMBER_CUE.findall(str(query).lower())
+        hits = list(dict.fromkeys(self.by_style_number[c] for c in codes if c in self.by_style_number))
+        if hits:
+            return hits
+        return list(self.by_name.get(" ".join(tokens), []))
+
+    def search(self, query, top_k=10, allowed=None):
+        """BM25 ranking; returns [(product id, score)] best first, only products sharing a term with the query.
+
+        `allowed` (a set of product ids) restricts scoring to those products, so filters never cost ranking depth.
+        """
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self.postings[term]:
+                if allowed is not None and self.ids[doc] not in allowed:
+                    continue
+                norm = K1 * (1 - B + B * self.doc_lengths[doc] / self.avg_length) if self.avg_length else K1
+                scores[doc] += idf * tf * (K1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: -item[1])[:top_k]
+        return [(self.ids[doc], score) for doc, score in best]
+
+def reciprocal_rank_fusion(rankings, k=60, weights=None):
+    """Fuses ranked id lists (best first) into one: score = sum(weight / (k + rank)). Scale-free, so BM25 and cosine mix."""
+    weights = weights or [1.0] * len(rankings)
+    fused = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        for rank, item in enumerate(ranking):
+            fused[item] += weight / (k + rank + 1)
+    return [item for item, _ in sorted(fused.items(), key=lambda entry: -entry[1])]
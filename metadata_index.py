@@ -0,0 +1,176 @@
+import re
+import numpy as np
+from product_vocabulary import COLOURS
+
+# ✅ Typed product attributes for filtered queries ("cotton tops under ₹2000")
+# Canonical value -> words that map to it (matched as whole tokens in sheet fields and in queries)
+FABRICS = {
+    "cotton": ["cotton", "cottons"],
+    "linen": ["linen"],
+    "silk": ["silk", "silks"],
+    "denim": ["denim"],
+    "polyester": ["polyester", "poly"],
+    "rayon": ["rayon", "viscose"],
+    "wool": ["wool", "woollen", "woolen"],
+    "chiffon": ["chiffon"],
+    "georgette": ["georgette"],
+    "crepe": ["crepe"],
+    "satin": ["satin"],
+    "velvet": ["velvet"],
+    "lycra": ["lycra", "spandex", "elastane"],
+    "khadi": ["khadi"],
+}
+CATEGORIES = {
+    "tops": ["tops", "shirt", "shirts", "tee", "tees", "tshirt", "tshirts", "blouse", "blouses", "kurta", "kurtas",
+             "kurti", "kurtis", "tunic", "tunics", "camisole", "sweater", "hoodie"],
+    "bottoms": ["bottoms", "trouser", "trousers", "pant", "pants", "jeans", "palazzo", "palazzos", "skirt",
+                "skirts", "shorts", "leggings", "joggers", "culottes"],
+    "dresses": ["dress", "dresses", "gown", "gowns", "maxi", "midi", "jumpsuit", "jumpsuits"],
+    "outerwear": ["jacket", "jackets", "coat", "coats", "blazer", "blazers", "shrug", "shrugs", "cardigan"],
+    "sets": ["coord", "coords"],
+    "sarees": ["saree", "sarees", "sari", "saris", "lehenga", "lehengas"],
+}
+# Everyday English too ("top picks", "what suits me", "a set of options"): these only name a category in a style
+# name, or in a query right after a fabric or garment qualifier ("cotton top", "crop top", "kurta set")
+AMBIGUOUS_CATEGORIES = {
+    "tops": ["top", "crop"],
+    "bottoms": ["bottom"],
+    "sets": ["set", "sets", "suit", "suits"],
+}
+GARMENT_QUALIFIERS = {"crop", "tank", "tube", "halter", "coord", "kurta", "salwar", "night", "track"}
+# Other descriptive words that change which product answers a query without being a catalog column
+PATTERNS = ["floral", "printed", "print", "striped", "stripes", "checked", "checks", "plaid", "solid", "plain",
+            "embroidered", "polka", "geometric", "tie", "dye", "sequin", "sequined", "lace"]
+FITS = ["oversized", "slim", "regular", "relaxed", "loose", "fitted", "flared", "straight", "wide", "skinny",
+        "cropped", "long", "short", "sleeveless", "halfsleeve", "fullsleeve", "sleeve", "sleeves"]
+NECKLINES = ["vneck", "round", "collar", "collared", "mandarin", "boat", "halter", "offshoulder", "square"]
+OCCASIONS = ["wedding", "party", "office", "casual", "formal", "festive", "festival", "diwali", "beach",
+             "summer", "winter", "monsoon", "ethnic", "traditional", "western", "gym", "travel"]
+ATTRIBUTE_WORDS = set(COLOURS + PATTERNS + FITS + NECKLINES + OCCASIONS)
+MAX_PRICE_WORDS = r"under|below|less than|cheaper than|within|upto|up to|max|maximum|at most|<=?"
+MIN_PRICE_WORDS = r"over|above|more than|at least|min|minimum|from|starting|>=?"
+_AMOUNT = r"(₹|rs\.?|inr)?\s*(\d[\d,]*(?:\.\d+)?)\s*(k\b)?"
+MIN_BARE_PRICE = 100  # "under 30" without ₹ / Rs is more likely an age or a size than a price
+
+def _tokens(text):
+    # "co-ord" / "t-shirt" count as one word
+    return re.findall(r"[a-z0-9]+", re.sub(r"(?<=[a-z])-(?=[a-z])", "", str(text).lower()))
+
+def _vocabulary(groups):
+    return {word: canonical for canonical, words in groups.items() for word in words}
+
+FABRIC_WORDS = _vocabulary(FABRICS)
+CATEGORY_WORDS = _vocabulary(CATEGORIES)
+AMBIGUOUS_CATEGORY_WORDS = _vocabulary(AMBIGUOUS_CATEGORIES)
+
+def _query_categories(tokens):
+    categories = set()
+    for i, token in enumerate(tokens):
+        if token in CATEGORY_WORDS:
+            categories.add(CATEGORY_WORDS[token])
+        elif token in AMBIGUOUS_CATEGORY_WORDS and i > 0 and (tokens[i - 1] in FABRIC_WORDS or tokens[i - 1] in GARMENT_QUALIFIERS):
+            categories.add(AMBIGUOUS_CATEGORY_WORDS[token])
+    return categories
+
+def parse_price(value):
+    """'₹1,299', 'Rs 1299.0', 1299 -> 1299.0; NaN when there is no number."""
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", str(value))
+    return float(match.group(0).replace(",", "")) if match else float("nan")
+
+def _amount(currency, number, thousands):
+    value = float(number.replace(",", "")) * (1000 if thousands else 1)
+    return value if currency or thousands or value >= MIN_BARE_PRICE else None
+
+def parse_filters(query):
+    """Constraints named in a shopper's query: {"min_price", "max_price", "fabrics", "categories"} (only those present)."""
+    text = str(query).lower()
+    filters = {}
+
+    # "between 1000 and 2000", "from 1k to 1.5k", "₹1000-2000"
+    between = re.search(rf"(?:between|from)\s*{_AMOUNT}\s*(?:and|to|-)\s*{_AMOUNT}", text) or \
+        re.search(rf"(?<![a-z])(?=₹|rs|inr){_AMOUNT}\s*(?:-|to)\s*{_AMOUNT}", text)
+    bounds = (_amount(*between.group(1, 2, 3)), _amount(between.group(1) or between.group(4), *between.group(5, 6))) if between else ()
+    if bounds and None not in bounds:
+        filters["min_price"], filters["max_price"] = min(bounds), max(bounds)
+    else:
+        upper = re.search(rf"(?:{MAX_PRICE_WORDS})\s*{_AMOUNT}", text)
+        lower = re.search(rf"(?:{MIN_PRICE_WORDS})\s*{_AMOUNT}", text)
+        for key, match in (("max_price", upper), ("min_price", lower)):
+            value = _amount(*match.group(1, 2, 3)) if match else None
+            if value is not None:
+                filters[key] = value
+
+    tokens = _tokens(text)
+    fabrics = {FABRIC_WORDS[t] for t in tokens if t in FABRIC_WORDS}
+    categories = _query_categories(tokens)
+    if fabrics:
+        filters["fabrics"] = fabrics
+    if categories:
+        filters["categories"] = categories
+    return filters
+
+def query_attributes(query):
+    """Colour, pattern, fit, neckline and occasion words in a query (sorted); softer than filters, but two queries
+    that differ in them ("red kurta" / "blue kurta") are asking for different products."""
+    return sorted({token for token in _tokens(query) if token in ATTRIBUTE_WORDS})
+
+def _bits(groups):
+    return {canonical: np.uint64(1) << np.uint64(i) for i, canonical in enumerate(groups)}
+
+FABRIC_BITS = _bits(FABRICS)
+CATEGORY_BITS = _bits(CATEGORIES)
+
+class MetadataIndex:
+    """Columnar arrays over the catalog: float price (NaN = unknown) and fabric / category bitmaps (uint64 per product)."""
+
+    def __init__(self, products):
+        """`products` maps product id -> dict with name / description / price / fabric."""
+        self.ids = np.array(list(products), dtype=object)
+        self.position = {product_id: i for i, product_id in enumerate(self.ids)}
+        self.price = np.array([parse_price(p.get("price", "")) for p in products.values()], dtype=np.float64)
+        self.fabrics = np.zeros(len(self.ids), dtype=np.uint64)
+        self.categories = np.zeros(len(self.ids), dtype=np.uint64)
+        for i, product in enumerate(products.values()):
+            for token in _tokens(product.get("fabric", "")):
+                if token in FABRIC_WORDS:
+                    self.fabrics[i] |= FABRIC_BITS[FABRIC_WORDS[token]]
+            # The sheet has no category column; the style name decides (where "Crop Top" is a garment, not a
+            # figure of speech), the description only when the name is silent and only through unambiguous words
+            for token in _tokens(product.get("name", "")):
+                category = CATEGORY_WORDS.get(token) or AMBIGUOUS_CATEGORY_WORDS.get(token)
+                if category:
+                    self.categories[i] |= CATEGORY_BITS[category]
+            if not self.categories[i]:
+                for token in _tokens(product.get("description", "")):
+                    if token in CATEGORY_WORDS:
+                        self.categories[i] |= CATEGORY_BITS[CATEGORY_WORDS[token]]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def mask(self, filters):
+        """Boolean array of the products that satisfy every filter.
+
+        Unknown prices never pass a price filter: a missing price is missing data, and "under ₹2000" is a promise.
+        Products with no inferred category always pass a category filter: category is guessed from free text, so
+        "no match" means "unknown", and hiding those styles would silently drop valid products.
+        """
+        keep = np.ones(len(self.ids), dtype=bool)
+        if "max_price" in filters:
+            keep &= self.price <= filters["max_price"]
+        if "min_price" in filters:
+            keep &= self.price >= filters["min_price"]
+        if filters.get("fabrics"):
+            wanted = np.uint64(0)
+            for fabric in filters["fabrics"]:
+                wanted |= FABRIC_BITS[fabric]
+            keep &= (self.fabrics & wanted) != 0
+        if filters.get("categories"):
+            wanted = np.uint64(0)
+            for category in filters["categories"]:
+                wanted |= CATEGORY_BITS[category]
+            keep &= ((self.categories & wanted) != 0) | (self.categories == 0)
+        return keep
+
+    def allowed(self, filters):
+        return set(self.ids[self.mask(filters)])
@@ -82,10 +82,10 @@ def chat_with_multi_agent(user_input):
 
     return response
 
-def process_image(image_path):
-    """Handles image-based queries using the ImageRecommendationAgent."""
+def process_image(image):
+    """Handles image-based queries using the ImageRecommendationAgent (path, bytes or an in-memory upload)."""
     try:
-        raw_response = image_recommendation(image_path)
+        raw_response = image_recommendation(image)
         return raw_response
     except Exception as e:
         return f"I'm sorry, I couldn't process that image. Error: {str(e)}"
@@ -0,0 +1,7 @@
+# ✅ Product words shared by the text filters (metadata_index.py) and the image build (image_dedup.py)
+
+# Colours shoppers ask for and image paths carry; not a catalog column, but colour variants must never be
+# treated as one product where things are matched by similarity
+COLOURS = ["black", "white", "red", "blue", "navy", "green", "olive", "yellow", "mustard", "orange", "pink", "peach",
+           "purple", "lavender", "maroon", "wine", "brown", "beige", "cream", "ivory", "grey", "gray", "gold", "silver",
+           "teal", "turquoise", "rust", "coral", "multicolour", "multicolor"]
@@ -1,8 +1,11 @@
 import openai
-from pinecone import Pinecone
 import os
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+import vector_store
+import retrieval_service
 from PIL import Image
 import IPython.display as display
 
@@ -12,32 +15,22 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 
 PINECONE_ENV = "us-east-1"
-PINECONE_INDEX_NAME = "vasavi"
+PINECONE_INDEX_NAME = "vasavi"  # embedded with text-embedding-3-small (see embedding_models.INDEXES)
 IMAGE_FOLDER = "converted_images"
 
+# ✅ Styling advice settings (override through environment variables)
+ADVICE_CONCURRENCY = int(os.getenv("ADVICE_CONCURRENCY", "3"))  # LLM calls in flight at once
+ADVICE_TIMEOUT_SECONDS = float(os.getenv("ADVICE_TIMEOUT_SECONDS", "60"))  # per product
+
 # Validate API Keys
-if not OPENAI_API_KEY or not PINECONE_API_KEY:
+if not OPENAI_API_KEY or (vector_store.requires_pinecone_key() and not PINECONE_API_KEY):
     raise ValueError("❌ Missing API keys. Check .env file!")
 
 # Initialize OpenAI API
 openai.api_key = OPENAI_API_KEY
 
-# Initialize Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(PINECONE_INDEX_NAME)
-
-# Function to generate query embedding
-def get_query_embedding(query):
-    """Generates an embedding for the query using OpenAI embeddings."""
-    try:
-        response = openai.embeddings.create(
-            input=query,
-            model="text-embedding-3-small"
-        )
-        return response.data[0].embedding  # Extract vector
-    except Exception as e:
-        print(f"⚠️ Error generating embedding: {e}")
-        return None
+# Product index: Pinecone, or the local store with VECTOR_STORE=local (shared through retrieval_service)
+index = retrieval_service.index_for(PINECONE_INDEX_NAME)
 
 # Function to fetch image path
 def get_image_path(image_name):
@@ -45,33 +38,28 @@ def get_image_path(image_name):
     image_path = os.path.join(IMAGE_FOLDER, image_name)
     return image_path if os.path.exists(image_path) else None
 
-# Function to search Pinecone for fashion recommendations
+# Function to search the product index for fashion recommendations
 def search_fashion_products(query, top_k=3):
-    """Finds the best-matching products from Pinecone and retrieves their details."""
-    embedding = get_query_embedding(query)
-    if embedding is None:
-        print("❌ Error: Could not generate embedding for query.")
+    """Finds the best-matching products through the shared retrieval service and retrieves their details."""
+    try:
+        products = retrieval_service.search(query, top_k, PINECONE_INDEX_NAME)
+    except Exception as e:
+        print(f"❌ Error: Product search failed: {e}")
         return []
     
-    # Perform search in Pinecone
-    results = index.query(vector=embedding, top_k=top_k, include_metadata=True)
-    
-    if not results.matches:
+    if not products:
         print("⚠️ No relevant matches found.")
         return []
     
     recommendations = []
-    for match in results.matches:
-        metadata = match.metadata
-        image_name = metadata.get("image_name", "Unknown.jpg")  # Image name in metadata
-        
+    for product in products:
         recommendations.append({
-            "Style Name": metadata.get("name", "Unknown"),
-            "Description": metadata.get("description", "No description available"),
-            "Price": metadata.get("price", "N/A"),
-            "Fabric": metadata.get("fabric", "Unknown"),
-            "Image Path": get_image_path(image_name),  # Get actual image path
-            "Score": round(match.score, 4)
+            "Style Name": product.name,
+            "Description": product.description,
+            "Price": product.price,
+            "Fabric": product.fabric,
+            "Image Path": get_image_path(product.image_name or "Unknown.jpg"),  # Get actual image path
+            "Score": round(product.score, 4) if product.score is not None else None  # None: exact / lexical match
         })
     
     return recommendations
@@ -106,30 +94,53 @@ def generate_fashion_advice(product):
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
-            ]
+            ],
+            timeout=ADVICE_TIMEOUT_SECONDS
         )
         return response.choices[0].message.content.strip()
     except Exception as e:
         return f"⚠️ Error generating fashion advice: {e}"
 
+# Function to generate advice for several products at once
+def stream_fashion_advice(products, max_workers=ADVICE_CONCURRENCY):
+    """Yields (position, product, advice) as each product's advice arrives, with at most `max_workers` LLM calls
+    in flight, so the first result costs one LLM round trip instead of waiting for the whole list.
+
+    A failing product yields its error message without affecting the others. Closing the generator early
+    (break, Ctrl+C) cancels the calls that have not started yet.
+    """
+    if not products:
+        return
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(products))), thread_name_prefix="advice")
+    futures = {executor.submit(generate_fashion_advice, product): position for position, product in enumerate(products)}
+    try:
+        for future in as_completed(futures):
+            position = futures[future]
+            try:
+                advice = future.result()
+            except Exception as e:
+                advice = f"⚠️ Error generating fashion advice: {e}"
+            yield position, products[position], advice
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 # Main function
 if __name__ == "__main__":
     user_query = input("🛍️ What kind of outfit are you looking for? ")
     results = search_fashion_products(user_query)
 
     if results:
-        print("\n🎉 **Top Fashion Recommendations:**\n")
-        for idx, item in enumerate(results, 1):
-            print(f"🔹 **Result {idx}:**")
+        print(f"\n🎉 **Top Fashion Recommendations:** {', '.join(item['Style Name'] for item in results)}\n")
+        start_time = time.time()
+        # Each product is shown with its advice as soon as that advice is ready
+        for idx, item, advice in stream_fashion_advice(results):
+            print(f"🔹 **Result {idx + 1}:**")
             print(f"👗 Style Name: {item['Style Name']}")
             print(f"📖 Description: {item['Description']}")
             print(f"💰 Price: {item['Price']}")
             print(f"🧵 Fabric: {item['Fabric']}")
             print(f"⭐ Score: {item['Score']}")
-
-            # Generate expert fashion advice
-            advice = generate_fashion_advice(item)
-            print(f"\n✨ **Fashion Expert's Advice:**\n{advice}\n")
+            print(f"\n✨ **Fashion Expert's Advice:** (after {time.time() - start_time:.1f}s)\n{advice}\n")
 
             # Display image if found
             if item["Image Path"]:
@@ -0,0 +1,206 @@
+import os
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import openai
+from dotenv import load_dotenv
+from lazy_loader import lazy
+import catalog
+import embedding_models
+import vector_store
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from metadata_index import MetadataIndex, parse_filters, parse_price
+
+# ✅ Product lookup shared by every agent (textRecom, recomendationAgent, test2_rag, customercare):
+# one pooled OpenAI client, one index object per product index, per-call deadlines and one Product record
+load_dotenv()
+
+# ✅ Retrieval settings (override through environment variables)
+TIMEOUT_SECONDS = float(os.getenv("RETRIEVAL_TIMEOUT_SECONDS", "10"))  # default deadline for one lookup
+POOL_SIZE = int(os.getenv("RETRIEVAL_POOL_SIZE", "16"))  # pooled HTTP connections & lookup worker threads
+MAX_RETRIES = int(os.getenv("RETRIEVAL_MAX_RETRIES", "2"))  # OpenAI client retries, within the deadline
+HYBRID_SEARCH = os.getenv("TEXT_HYBRID_SEARCH", "1") == "1"
+LEXICAL_WEIGHT = float(os.getenv("TEXT_LEXICAL_WEIGHT", "1.0"))  # weight of the BM25 ranking in the fusion
+HYBRID_CANDIDATES = int(os.getenv("TEXT_HYBRID_CANDIDATES", "20"))  # candidates taken from each ranking before fusing
+FILTER_OVERFETCH = float(os.getenv("TEXT_FILTER_OVERFETCH", "1.5"))  # slack on top of top_k / filter selectivity
+FILTER_MAX_FETCH = int(os.getenv("TEXT_FILTER_MAX_FETCH", "1000"))  # Pinecone's top_k ceiling when metadata is included
+
+class RetrievalTimeout(TimeoutError):
+    pass
+
+class Product(vector_store.Record):
+    """One product, whichever index or sheet it came from.
+
+    Keys: id (style number), name, description, price (as listed), price_value (float, NaN = unknown),
+    fabric, image_name (None unless the index stores one) and score (vector similarity, None when the
+    product was found lexically or by exact match).
+    """
+
+    @classmethod
+    def from_metadata(cls, product_id, metadata, score=None):
+        # dataset_index writes name / description / price / fabric; the raw sheet column names are still accepted
+        price = metadata.get("price", metadata.get("PRICES", "N/A"))
+        return cls(
+            id=product_id,
+            name=metadata.get("name", metadata.get("STYLE NAME", "Unknown")),
+            description=metadata.get("description", metadata.get("DESCRIPTION", "No description available")),
+            price=price,
+            price_value=parse_price(price),
+            fabric=metadata.get("fabric", metadata.get("FABRIC DESCRIPTION", "Unknown")),
+            image_name=metadata.get("image_name"),
+            score=score,
+        )
+
+# Pooled OpenAI client: keep-alive connections shared by every lookup thread
+def _openai_client():
+    import httpx
+    return openai.OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        timeout=TIMEOUT_SECONDS,
+        max_retries=MAX_RETRIES,
+        http_client=openai.DefaultHttpxClient(
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+        ),
+    )
+
+openai_client = lazy("retrieval_openai_client", _openai_client)
+
+# Lookups run on this pool so a deadline can be enforced on any backend call
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="retrieval")
+
+def index_for(index_name=embedding_models.DEFAULT_INDEX, create=False):
+    """Lazy handle on the one index object this process uses for `index_name` (connected on first lookup)."""
+    return lazy(
+        f"retrieval_index:{index_name}",
+        lambda: embedding_models.open_index(index_name, create=create, pool_threads=POOL_SIZE),
+    )
+
+def _populated(index_name, fallback):
+    try:
+        stats = index_for(index_name).get().describe_index_stats()
+        if stats.get("total_vector_count"):
+            return index_name
+        problem = "is empty"
+    except Exception as e:
+        problem = f"can't be opened ({e})"
+    print(f"⚠️ Product index '{index_name}' {problem}, using '{fallback}' instead. "
+          f"Build it with: python dataset_index.py --index {index_name}")
+    return fallback
+
+def populated_index(index_name, fallback=embedding_models.DEFAULT_INDEX):
+    """Lazy name of `index_name` if it holds vectors, else of `fallback` (checked once, on first lookup)."""
+    return lazy(f"retrieval_index_choice:{index_name}", lambda: _populated(index_name, fallback))
+
+# Product sheet, typed filter columns (price / fabric / category) and BM25 over style name, description & fabric,
+# built once on first lookup
+def _load_catalog():
+    try:
+        products = catalog.load_products()
+    except (FileNotFoundError, ValueError) as e:
+        print(f"⚠️ Catalog filters and hybrid search disabled, product sheet unavailable: {e}")
+        return None
+    return {
+        "products": products,
+        "filters": MetadataIndex(products),
+        "lexical": BM25Index(products) if HYBRID_SEARCH else None,
+    }
+
+product_catalog = lazy("retrieval_catalog", _load_catalog)
+
+def _deadline(timeout):
+    return time.monotonic() + (TIMEOUT_SECONDS if timeout is None else timeout)
+
+def _remaining(deadline):
+    return max(deadline - time.monotonic(), 0.1)
+
+def _attempt_timeout(deadline):
+    # The client retries up to MAX_RETRIES times; sharing the time left between attempts keeps the whole call,
+    # and the pool thread running it, inside the deadline instead of outliving the caller's fallback
+    return _remaining(deadline) / (MAX_RETRIES + 1)
+
+def _within(deadline, what, call):
+    """call() on the lookup pool; RetrievalTimeout once `deadline` (time.monotonic) passes."""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise RetrievalTimeout(f"⏱️ {what} skipped, the lookup deadline already passed")
+    future = _executor.submit(call)
+    try:
+        return future.result(timeout=remaining)
+    except FutureTimeout:
+        future.cancel()
+        raise RetrievalTimeout(f"⏱️ {what} did not finish within the lookup deadline") from None
+
+def query_embedding(query, index_name=embedding_models.DEFAULT_INDEX, timeout=None, deadline=None):
+    """Embedding of `query` with the model registered for `index_name` (shared cache first)."""
+    deadline = deadline or _deadline(timeout)
+    # Local models need neither an API key nor the pooled HTTP client
+    uses_openai = embedding_models.MODELS[embedding_models.model_for(index_name)]["provider"] == "openai"
+    return _within(deadline, "Query embedding", lambda: embedding_models.embed_query(
+        query, index_name, client=openai_client.get() if uses_openai else None, timeout=_attempt_timeout(deadline),
+    ))
+
+def _vector_matches(query, top_k, index_name, deadline):
+    vector = query_embedding(query, index_name, deadline=deadline)
+    # _request_timeout: Pinecone's own per-request timeout (the local store ignores it)
+    response = _within(deadline, "Vector search", lambda: index_for(index_name).get().query(
+        vector=vector, top_k=top_k, include_metadata=True, _request_timeout=_remaining(deadline)
+    ))
+    return response.matches
+
+def _fetch_size(wanted, selectivity):
+    """Over-fetch so that, after filtering, `wanted` matches still survive in a single query."""
+    if selectivity >= 1.0:
+        return wanted
+    return min(FILTER_MAX_FETCH, max(wanted, math.ceil(wanted / selectivity * FILTER_OVERFETCH)))
+
+def exact_matches(query):
+    """Products the query names outright (style number or exact style name), straight from the catalog."""
+    loaded = product_catalog.get()
+    if loaded is None or loaded["lexical"] is None:
+        return []
+    return [Product.from_metadata(product_id, loaded["products"][product_id]) for product_id in loaded["lexical"].exact_matches(query)]
+
+def search(query, top_k=5, index_name=embedding_models.DEFAULT_INDEX, timeout=None):
+    """Products for `query`, best first: exact catalog hits, otherwise BM25 fused with the vector index, both
+    restricted to the products that satisfy the price / fabric / category named in the query.
+
+    The whole lookup (embedding + vector search) must finish within `timeout` seconds (default
+    RETRIEVAL_TIMEOUT_SECONDS), else RetrievalTimeout.
+    """
+    deadline = _deadline(timeout)
+    loaded = product_catalog.get()
+    if loaded is None:
+        return [Product.from_metadata(m.id, m.metadata, m.score) for m in _vector_matches(query, top_k, index_name, deadline)]
+    products, lexical = loaded["products"], loaded["lexical"]
+
+    # A style number or an exact style name is answered from the catalog, without an embedding round trip
+    exact = exact_matches(query)
+    if exact:
+        return exact[:top_k]
+
+    # "cotton tops under ₹2000": constraints are enforced on the typed columns, never left to similarity
+    filters = parse_filters(query)
+    allowed = loaded["filters"].allowed(filters) if filters else None
+    if allowed is not None and not allowed:
+        return []
+    selectivity = len(allowed) / len(products) if allowed is not None else 1.0
+
+    candidates = max(top_k, HYBRID_CANDIDATES)
+    lexical_ranking = [product_id for product_id, _ in lexical.search(query, candidates, allowed)] if lexical is not None else []
+    wanted = candidates if lexical_ranking else top_k
+    matches = _vector_matches(query, _fetch_size(wanted, selectivity), index_name, deadline)
+    if allowed is not None:
+        matches = [match for match in matches if match.id in allowed][:wanted]
+
+    # The sheet is the source of truth for product fields; index metadata only fills in for styles it lacks
+    scores = {match.id: match.score for match in matches}
+    vector_metadata = {match.id: match.metadata for match in matches}
+    if lexical_ranking:
+        # Reciprocal rank fusion: literal matches move up without drowning out semantic neighbours
+        ranked = reciprocal_rank_fusion([[match.id for match in matches], lexical_ranking], weights=[1.0, LEXICAL_WEIGHT])
+    else:
+        ranked = [match.id for match in matches]
+    return [
+        Product.from_metadata(product_id, products.get(product_id) or vector_metadata[product_id], scores.get(product_id))
+        for product_id in ranked[:top_k]
+    ]
@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+import numpy as np
+
+# ✅ Semantic answer cache settings (override through environment variables)
+ENABLED = os.getenv("SEMANTIC_CACHE", "1") == "1"
+THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.90"))  # cosine similarity a paraphrase must reach
+MAX_ITEMS = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+REPORT_EVERY = int(os.getenv("SEMANTIC_CACHE_REPORT_EVERY", "100"))  # log stats every N lookups (0 = never)
+
+class SemanticCache:
+    """Answers keyed on query embeddings: a new query reuses the stored answer of its nearest cached query
+    when their cosine similarity reaches `threshold`.
+
+    Entries only match within the same `scope` (e.g. the hard filters parsed from the query) and are all
+    dropped when `version` (the catalog generation) changes. Least recently used entries go first when full.
+    """
+
+    def __init__(self, name, threshold=THRESHOLD, max_items=MAX_ITEMS, ttl_seconds=TTL_SECONDS):
+        self.name = name
+        self.threshold = threshold
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.version = None
+        self._vectors = None  # (max_items, dim) unit vectors, allocated on first store
+        self._entries = [None] * max_items  # slot -> {"scope", "answer", "created", "seconds"}
+        self._used = np.zeros(max_items)  # last use per slot; 0 = free
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0, "seconds_saved": 0.0}
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self.version is not None and any(self._entries):
+                self.counters["invalidations"] += 1
+                print(f"🔄 {self.name}: catalog changed, cleared cached answers")
+            self._entries = [None] * self.max_items
+            self._used[:] = 0
+            self.version = version
+
+    def lookup(self, embedding, scope="", version=None):
+        """Cached answer for the closest query in `scope`, or None."""
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        now = time.time()
+        with self._lock:
+            self._check_version(version)
+            best = None
+            if self._vectors is not None and self._vectors.shape[1] == len(query):
+                live = np.flatnonzero(self._used)
+                if len(live):
+                    scores = self._vectors[live] @ query
+                    for i in np.argsort(-scores):
+                        if scores[i] < self.threshold:
+                            break
+                        entry = self._entries[live[i]]
+                        if entry["scope"] == scope and (self.ttl_seconds <= 0 or now - entry["created"] < self.ttl_seconds):
+                            best = live[i]
+                            break
+            if best is None:
+                self.counters["misses"] += 1
+                self._maybe_report()
+                return None
+            self._used[best] = now
+            self.counters["hits"] += 1
+            self.counters["seconds_saved"] += self._entries[best]["seconds"]
+            self._maybe_report()
+            return self._entries[best]["answer"]
+
+    def store(self, embedding, answer, scope="", version=None, seconds=0.0):
+        """Caches `answer`; `seconds` is what computing it cost, counted as saved on every later hit."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._check_version(version)
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self.max_items, len(vector)), dtype=np.float32)
+                self._entries = [None] * self.max_items
+                self._used[:] = 0
+            slot = int(np.argmin(self._used))  # a free slot, else the least recently used one
+            self._vectors[slot] = vector
+            self._entries[slot] = {"scope": scope, "answer": answer, "created": time.time(), "seconds": seconds}
+            self._used[slot] = time.time()
+
+    def get_or_compute(self, embedding, compute, scope="", version=None, cacheable=None):
+        """Cached answer, or compute() (timed, and stored unless `cacheable(answer)` says it is a fallback)."""
+        if not ENABLED or embedding is None:
+            return compute()
+        answer = self.lookup(embedding, scope, version)
+        if answer is not None:
+            return answer
+        start_time = time.time()
+        answer = compute()
+        if answer is not None and (cacheable is None or cacheable(answer)):
+            self.store(embedding, answer, scope, version, time.time() - start_time)
+        return answer
+
+    def _maybe_report(self):
+        lookups = self.counters["hits"] + self.counters["misses"]
+        if REPORT_EVERY and lookups % REPORT_EVERY == 0:
+            print(f"📊 {self.name}: {self._stats_locked()}")
+
+    def _stats_locked(self):
+        counters = dict(self.counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["entries"] = int(np.count_nonzero(self._used))
+        counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        return counters
+
+    def stats(self):
+        """Hits, misses, hit rate, seconds saved, live entries and catalog invalidations."""
+        with self._lock:
+            return self._stats_locked()
@@ -1,7 +1,8 @@
 import openai
-from pinecone import Pinecone
 import os
 from dotenv import load_dotenv
+import vector_store
+import retrieval_service
 
 # Load API Keys
 load_dotenv()
@@ -9,56 +10,40 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 
 PINECONE_ENV = "us-east-1"
-PINECONE_INDEX_NAME = "vasavi"
+PINECONE_INDEX_NAME = "vasavi"  # embedded with text-embedding-3-small (see embedding_models.INDEXES)
 
 # Validate API Keys
-if not OPENAI_API_KEY or not PINECONE_API_KEY:
+if not OPENAI_API_KEY or (vector_store.requires_pinecone_key() and not PINECONE_API_KEY):
     raise ValueError("❌ Missing API keys. Check .env file!")
 
 # Initialize OpenAI API
 openai.api_key = OPENAI_API_KEY
 
-# Initialize Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(PINECONE_INDEX_NAME)
+# Product index: Pinecone, or the local store with VECTOR_STORE=local (shared through retrieval_service)
+index = retrieval_service.index_for(PINECONE_INDEX_NAME)
 
-# Function to generate query embedding
-def get_query_embedding(query):
+# Function to search the product index for recommendations
+def search_fashion_products(query, top_k=5):
     try:
-        response = openai.embeddings.create(
-            input=query,
-            model="text-embedding-3-small"
-        )
-        return response.data[0].embedding  # Extract vector
+        products = retrieval_service.search(query, top_k, PINECONE_INDEX_NAME)
     except Exception as e:
-        print(f"⚠️ Error generating embedding: {e}")
-        return None
-
-# Function to search Pinecone for recommendations
-def search_fashion_products(query, top_k=5):
-    embedding = get_query_embedding(query)
-    if embedding is None:
-        print("❌ Error: Could not generate embedding for query.")
+        print(f"❌ Error: Product search failed: {e}")
         return []
     
-    # Perform search in Pinecone
-    results = index.query(vector=embedding, top_k=top_k, include_metadata=True)
-    
-    if not results.matches:
+    if not products:
         print("⚠️ No relevant matches found.")
         return []
     
     # Print results
     recommendations = []
     print("\n🔍 **Search Results:**")
-    for match in results.matches:
-        metadata = match.metadata
+    for product in products:
         recommendations.append({
-            "Style Name": metadata.get("name", "Unknown"),
-            "Description": metadata.get("description", "No description"),
-            "Price": metadata.get("price", "N/A"),
-            "Fabric": metadata.get("fabric", "Unknown"),
-            "Score": round(match.score, 4)
+            "Style Name": product.name,
+            "Description": product.description,
+            "Price": product.price,
+            "Fabric": product.fabric,
+            "Score": round(product.score, 4) if product.score is not None else None  # None: exact / lexical match
         })
     
     return recommendations
@@ -1,34 +1,22 @@
 import os
-from openai import OpenAI
-from pinecone import Pinecone, ServerlessSpec
+import json
 from dotenv import load_dotenv
+import catalog
+import retrieval_service
+from metadata_index import parse_filters, query_attributes
+import semantic_cache
 
 # Load API keys from .env file
 load_dotenv()
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-INDEX_NAME = "vasavi"
+INDEX_NAME = "vasavi"  # embedded with text-embedding-3-small (see embedding_models.INDEXES)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Product index (Pinecone, or the local store with VECTOR_STORE=local), connected and created if missing on first
+# recommendation; lookups themselves go through retrieval_service
+index = retrieval_service.index_for(INDEX_NAME, create=True)
 
-# Initialize Pinecone client
-pc = Pinecone(api_key=PINECONE_API_KEY)
-
-# Ensure index exists, otherwise create it
-if INDEX_NAME not in pc.list_indexes().names():
-    pc.create_index(
-        name=INDEX_NAME, 
-        dimension=1536,  # Adjust if needed
-        metric='cosine',
-        spec=ServerlessSpec(
-            cloud='aws',
-            region='us-east-1'  # Your specified region
-        )
-    )
-
-# Connect to existing Pinecone index
-index = pc.Index(INDEX_NAME)
+# Paraphrased requests ("party wear for girls" / "party outfits for women") reuse the stored answer
+answer_cache = semantic_cache.SemanticCache("Recommendation answer cache")
 
 # System prompt for fashion recommendations
 SYSTEM_PROMPT = """
@@ -58,43 +46,60 @@ Be warm, friendly, and professional in your responses.
    - Always close with an invitation to explore more Vasavi products.
 """
 
-# Function to get text embeddings
+# Function to get text embeddings with the index's registered model (repeat queries come from the shared cache)
 def get_embedding(text: str):
-    embedding_response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=text
-    )
-    return embedding_response.data[0].embedding
+    return retrieval_service.query_embedding(text, INDEX_NAME)
 
-# Function to fetch recommendations from Pinecone
-def fetch_recommendation(query: str, top_k: int = 5):
-    query_embedding = get_embedding(query)
-    
-    response = index.query(
-        vector=query_embedding,
-        top_k=top_k,
-        include_metadata=True
-    )
-
-    recommendations = []
-    for match in response.matches:
-        metadata = match.metadata
-
-        recommendations.append({
-            "style_name": metadata.get("STYLE NAME", "Unknown"),
-            "description": metadata.get("DESCRIPTION", "No description available"),
-            "price": metadata.get("PRICES", "N/A"),
-            "fabric": metadata.get("FABRIC DESCRIPTION", "Unknown"),
-        })
-    
-    return recommendations
+def _recommendation(product):
+    return {
+        "style_name": product.name,
+        "description": product.description,
+        "price": product.price,
+        "fabric": product.fabric,
+    }
 
-# Function to generate AI-powered fashion recommendations
-def generate_response(user_query: str):
+# Function to fetch recommendations (exact catalog hits, filtered hybrid search: see retrieval_service.search)
+def fetch_recommendation(query: str, top_k: int = 5):
+    return [_recommendation(product) for product in retrieval_service.search(query, top_k, INDEX_NAME)]
+
+def _answer_scope(query: str, kind: str):
+    """Cache scope for `query`: paraphrases only share answers under the same hard filters and the same colour /
+    pattern / fit / occasion words, which embeddings barely separate ("red kurta" vs "blue kurta").
+    None when the query names a product outright (answered from the catalog, nothing to save)."""
+    if retrieval_service.exact_matches(query):
+        return None
+    filters = parse_filters(query)
+    return json.dumps({
+        "kind": kind,
+        "attributes": query_attributes(query),
+        **{key: sorted(value) if isinstance(value, set) else value for key, value in filters.items()},
+    }, sort_keys=True)
+
+# Apologies, errors and "nothing found" can come from a passing outage; they are served but never cached
+NO_MATCH_ANSWER = "I couldn't find any Vasavi products matching your query. Would you like to explore our latest collection? Visit [Vasavi.co](https://vasavi.co/)"
+FALLBACK_PREFIXES = ("I'm sorry", "Sorry", "I couldn't", "⚠️", "❌")
+
+def is_cacheable(answer):
+    return isinstance(answer, str) and answer.strip() != "" and answer != NO_MATCH_ANSWER \
+        and not answer.lstrip().startswith(FALLBACK_PREFIXES)
+
+def cached_answer(query: str, compute, kind: str = "recommendation"):
+    """compute() behind the semantic answer cache; invalidated whenever the catalog sheet changes."""
+    scope = _answer_scope(query, kind) if semantic_cache.ENABLED else None
+    if scope is None:
+        return compute()
+    try:
+        embedding = get_embedding(query)  # shared embedding cache, so fetch_recommendation does not pay for it again
+    except Exception as e:
+        print(f"⚠️ Answer cache skipped, query embedding failed: {e}")
+        return compute()
+    return answer_cache.get_or_compute(embedding, compute, scope=scope, version=catalog.catalog_version(), cacheable=is_cacheable)
+
+def _generate_response(user_query: str):
     recommendations = fetch_recommendation(user_query)
     
     if not recommendations:
-        return "I couldn't find any Vasavi products matching your query. Would you like to explore our latest collection? Visit [Vasavi.co](https://vasavi.co/)"
+        return NO_MATCH_ANSWER
 
     # Format recommendations for response
     recommendation_text = "\n".join([
@@ -107,6 +112,10 @@ def generate_response(user_query: str):
 
     return f"Here are some Vasavi products matching your request:\n\n{recommendation_text}\n\nVisit [Vasavi.co](https://vasavi.co/) for more options!"
 
+# Function to generate AI-powered fashion recommendations
+def generate_response(user_query: str):
+    return cached_answer(user_query, lambda: _generate_response(user_query))
+
 # Function to get fashion recommendations
 def get_fashion_recommendations(user_query: str):
     return generate_response(user_query)
@@ -8,28 +8,35 @@ from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage
 from tavily import search_tavily  # ✅ Import Tavily search function
 from reddit import fetch_reddit_posts  # ✅ Import Reddit search function
+from lazy_loader import lazy
 
 # Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Initialize LLM (GPT-4 Turbo)
-llm = ChatOpenAI(model="gpt-4-turbo", temperature=0.7)
+# Initialize LLM (GPT-4 Turbo) on first use
+llm = lazy("trend_llm", lambda: ChatOpenAI(model="gpt-4-turbo", temperature=0.7))
 
-# Initialize search tools
-duckduckgo = DuckDuckGo()
-searxng_search = Searxng(host="https://searx.be", fixed_max_results=5, news=True, science=True)
-crawl4ai_search = Crawl4aiTools()  # No API key required
+# Initialize search tools on first use
+def _load_search_tools():
+    return {
+        "DuckDuckGo": DuckDuckGo(),
+        "Searxng": Searxng(host="https://searx.be", fixed_max_results=5, news=True, science=True),
+        "Crawl4AI": Crawl4aiTools(),  # No API key required
+    }
+
+search_tools = lazy("trend_search_tools", _load_search_tools)
 
 def get_fashion_insights(query: str):
     """Fetches insights using multiple search tools and generates a human-friendly expert response."""
     try:
         search_results = {}
+        tools = search_tools.get()
         tool_map = {
             "Tavily": search_tavily,
-            "DuckDuckGo": duckduckgo,
-            "Searxng": searxng_search,
-            "Crawl4AI": crawl4ai_search,
+            "DuckDuckGo": tools["DuckDuckGo"],
+            "Searxng": tools["Searxng"],
+            "Crawl4AI": tools["Crawl4AI"],
             "Reddit": fetch_reddit_posts
         }
 
@@ -68,7 +75,7 @@ def get_fashion_insights(query: str):
         """
 
         # Generate structured response using GPT-4 Turbo
-        structured_answer = llm.invoke([
+        structured_answer = llm.get().invoke([
             HumanMessage(content=f"""
             {SYSTEM_PROMPT}
 
@@ -92,9 +99,10 @@ def fetch_trend_insights(query: str):
 
 # Run script only if executed directly
 if __name__ == "__main__":
+    tools = search_tools.get()
     print("\n🔧 Environment Setup:")
-    print(f"DuckDuckGo: {'✅ Available' if duckduckgo else '❌ Not available'}")
-    print(f"Searxng: {'✅ Available' if searxng_search else '❌ Not available'}")
+    print(f"DuckDuckGo: {'✅ Available' if tools['DuckDuckGo'] else '❌ Not available'}")
+    print(f"Searxng: {'✅ Available' if tools['Searxng'] else '❌ Not available'}")
     print(f"Crawl4AI: {'✅ Available'}")  # Always available
     print(f"Tavily: {'✅ Available'}")  # Assuming Tavily function works
     print(f"Reddit: {'✅ Available'}")  # Assuming Reddit function works
@@ -0,0 +1,330 @@
+import os
+import json
+import time
+import argparse
+import threading
+import contextlib
+import numpy as np
+
+# ✅ Vector store backend (override through environment variables)
+#   pinecone - hosted Pinecone index (default)
+#   local    - in-process NumPy matrix + metadata table persisted under LOCAL_VECTOR_STORE_DIR; no network
+BACKENDS = ("pinecone", "local")
+VECTOR_STORE = os.getenv("VECTOR_STORE", "pinecone").lower()
+LOCAL_STORE_DIR = os.getenv("LOCAL_VECTOR_STORE_DIR", "local_vector_store")
+
+class Record(dict):
+    """dict with attribute access, so results read like Pinecone's (`res.matches` as well as `res["matches"]`)."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+_MISSING = object()
+FILTER_OPERATORS = {
+    "$eq": lambda value, target: value == target,
+    "$ne": lambda value, target: value != target,
+    "$in": lambda value, targets: value in targets,
+    "$nin": lambda value, targets: value not in targets,
+    "$gt": lambda value, target: value > target,
+    "$gte": lambda value, target: value >= target,
+    "$lt": lambda value, target: value < target,
+    "$lte": lambda value, target: value <= target,
+}
+
+def _field_matches(value, condition):
+    conditions = condition if isinstance(condition, dict) else {"$eq": condition}
+    for operator, target in conditions.items():
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(
+                f"❌ Unsupported filter operator '{operator}' for the local vector store ({', '.join(FILTER_OPERATORS)})."
+            )
+        if operator in ("$in", "$nin") and not isinstance(target, (list, tuple, set)):
+            raise ValueError(f"❌ Filter operator '{operator}' takes a list, got {target!r}.")
+        if value is _MISSING:
+            if operator in ("$ne", "$nin"):
+                continue
+            return False
+        # Like Pinecone, a list field matches when any of its elements does ($ne / $nin: when none does)
+        values = value if isinstance(value, list) else [value]
+        try:
+            if operator in ("$ne", "$nin"):
+                ok = all(FILTER_OPERATORS[operator](v, target) for v in values)
+            else:
+                ok = any(FILTER_OPERATORS[operator](v, target) for v in values)
+        except TypeError:
+            ok = False  # e.g. "$lte" on a text field
+        if not ok:
+            return False
+    return True
+
+def matches_filter(metadata, filter):
+    """Pinecone metadata filter semantics: {"field": value}, {"field": {"$op": value}}, "$and" / "$or" lists."""
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, part) for part in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, part) for part in condition):
+                return False
+        elif key.startswith("$"):
+            raise ValueError(f"❌ Unsupported filter operator '{key}' for the local vector store ($and / $or).")
+        elif not _field_matches(metadata.get(key, _MISSING), condition):
+            return False
+    return True
+
+class LocalVectorStore:
+    """Pinecone-compatible query / upsert / update / delete / fetch over an in-memory matrix.
+
+    `query(filter=...)` takes Pinecone metadata filters: implicit equality, $eq / $ne / $in / $nin / $gt / $gte /
+    $lt / $lte per field and $and / $or; rows are filtered before scoring, so top_k counts matching rows only.
+    Any other operator raises ValueError. Rows missing a field fail every operator on it except $ne / $nin.
+
+    Stored as <directory>/vectors.npy (float32, one row per id) and <directory>/records.json (ids, metadata,
+    metric). Every change is written straight back to disk, except inside `with store.bulk():`, which saves once
+    at the end.
+    """
+
+    def __init__(self, directory, dimension=None, metric="cosine"):
+        if metric not in ("cosine", "dotproduct"):
+            raise ValueError(f"❌ Unsupported metric '{metric}' for the local vector store (cosine / dotproduct).")
+        self.directory = directory
+        self.metric = metric
+        self.dimension = dimension
+        self.ids = []
+        self.metadata = []
+        self.vectors = np.empty((0, dimension or 0), dtype=np.float32)
+        self._rows = {}
+        self._lock = threading.RLock()
+        self._deferred = 0
+        self._load()
+
+    def _paths(self):
+        return os.path.join(self.directory, "vectors.npy"), os.path.join(self.directory, "records.json")
+
+    def _load(self):
+        vectors_path, records_path = self._paths()
+        if not os.path.exists(records_path):
+            return
+        with open(records_path, "r") as f:
+            records = json.load(f)
+        vectors = np.load(vectors_path)
+        if self.dimension and vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"❌ Local vector store '{self.directory}' holds {vectors.shape[1]}-d vectors, expected {self.dimension}-d."
+            )
+        self.metric = records.get("metric", self.metric)
+        self.dimension = int(vectors.shape[1])
+        self.ids, self.metadata, self.vectors = records["ids"], records["metadata"], vectors
+        self._rows = {vector_id: row for row, vector_id in enumerate(self.ids)}
+
+    def save(self):
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            vectors_path, records_path = self._paths()
+            with open(f"{vectors_path}.tmp", "wb") as f:
+                np.save(f, self.vectors)
+            with open(f"{records_path}.tmp", "w") as f:
+                json.dump({"version": 1, "metric": self.metric, "ids": self.ids, "metadata": self.metadata}, f)
+            os.replace(f"{vectors_path}.tmp", vectors_path)
+            os.replace(f"{records_path}.tmp", records_path)
+
+    def _changed(self):
+        if not self._deferred:
+            self.save()
+
+    @contextlib.contextmanager
+    def bulk(self):
+        """Batches many upserts / deletes into a single save."""
+        with self._lock:
+            self._deferred += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._deferred -= 1
+                if not self._deferred:
+                    self.save()
+
+    def _prepare(self, values):
+        vector = np.asarray(values, dtype=np.float32).reshape(-1)
+        if self.dimension is None:
+            self.dimension = len(vector)
+            self.vectors = np.empty((0, self.dimension), dtype=np.float32)
+        if len(vector) != self.dimension:
+            raise ValueError(f"❌ Vector dimension {len(vector)} does not match the index dimension {self.dimension}.")
+        if self.metric == "cosine":
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm else vector
+        return vector
+
+    # ✅ Pinecone-compatible surface
+    def upsert(self, vectors, namespace=None, **kwargs):
+        """Accepts (id, values[, metadata]) tuples or {"id", "values", "metadata"} dicts, like Pinecone."""
+        items = [v if isinstance(v, dict) else dict(zip(("id", "values", "metadata"), v)) for v in vectors]
+        with self._lock:
+            rows = [self._prepare(item["values"]) for item in items]
+            new_rows = []
+            for item, vector in zip(items, rows):
+                vector_id = str(item["id"])
+                row = self._rows.get(vector_id)
+                if row is None:
+                    self._rows[vector_id] = len(self.ids)
+                    new_rows.append(vector)
+                    self.ids.append(vector_id)
+                    self.metadata.append(item.get("metadata") or {})
+                else:
+                    self.vectors[row] = vector
+                    self.metadata[row] = item.get("metadata") or {}
+            if new_rows:
+                self.vectors = np.vstack([self.vectors, np.stack(new_rows)])
+            self._changed()
+        return Record(upserted_count=len(items))
+
+    def query(self, vector, top_k=10, include_metadata=False, include_values=False, namespace=None, filter=None, **kwargs):
+        query = self._prepare(vector)
+        with self._lock:
+            vectors, ids, metadata = self.vectors, self.ids, self.metadata
+        rows = np.arange(len(ids))
+        if filter:
+            rows = np.array([row for row in rows if matches_filter(metadata[row], filter)], dtype=np.int64)
+        if not len(rows):
+            return Record(matches=[], namespace=namespace or "")
+
+        scores = (vectors @ query)[rows]
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        matches = []
+        for position in best:
+            row = rows[position]
+            match = Record(id=ids[row], score=float(scores[position]))
+            if include_metadata:
+                match["metadata"] = metadata[row]
+            if include_values:
+                match["values"] = vectors[row].tolist()
+            matches.append(match)
+        return Record(matches=matches, namespace=namespace or "")
+
+    def update(self, id, values=None, set_metadata=None, namespace=None, **kwargs):
+        with self._lock:
+            row = self._rows.get(str(id))
+            if row is None:
+                return Record()
+            if values is not None:
+                self.vectors[row] = self._prepare(values)
+            if set_metadata:
+                self.metadata[row] = {**self.metadata[row], **set_metadata}
+            self._changed()
+        return Record()
+
+    def delete(self, ids=None, delete_all=False, namespace=None, **kwargs):
+        with self._lock:
+            drop = set(range(len(self.ids))) if delete_all else {self._rows[str(i)] for i in ids or [] if str(i) in self._rows}
+            if drop:
+                keep = [row for row in range(len(self.ids)) if row not in drop]
+                self.vectors = self.vectors[keep]
+                self.ids = [self.ids[row] for row in keep]
+                self.metadata = [self.metadata[row] for row in keep]
+                self._rows = {vector_id: row for row, vector_id in enumerate(self.ids)}
+                self._changed()
+        return Record()
+
+    def fetch(self, ids, namespace=None, **kwargs):
+        with self._lock:
+            vectors = {
+                str(i): Record(id=str(i), values=self.vectors[self._rows[str(i)]].tolist(), metadata=self.metadata[self._rows[str(i)]])
+                for i in ids if str(i) in self._rows
+            }
+        return Record(vectors=vectors, namespace=namespace or "")
+
+    def describe_index_stats(self, **kwargs):
+        return Record(dimension=self.dimension, total_vector_count=len(self.ids))
+
+class DimensionCheckedIndex:
+    """Wraps a Pinecone index so vectors of the wrong size are refused locally instead of mixing embedding models."""
+
+    def __init__(self, index, name, dimension):
+        self._index = index
+        self.name = name
+        self.dimension = dimension
+        actual = index.describe_index_stats().get("dimension")
+        if actual and actual != dimension:
+            raise ValueError(f"❌ Pinecone index '{name}' holds {actual}-d vectors, expected {dimension}-d.")
+
+    def __getattr__(self, attr):
+        return getattr(self._index, attr)
+
+    def _check(self, values):
+        if len(values) != self.dimension:
+            raise ValueError(f"❌ {len(values)}-d vector for index '{self.name}', which holds {self.dimension}-d vectors.")
+
+    def query(self, vector=None, **kwargs):
+        if vector is not None:
+            self._check(vector)
+        return self._index.query(vector=vector, **kwargs)
+
+    def upsert(self, vectors, **kwargs):
+        for v in vectors:
+            self._check(v["values"] if isinstance(v, dict) else v[1])
+        return self._index.upsert(vectors=vectors, **kwargs)
+
+def open_index(name, dimension=None, create=False, backend=None, metric="cosine", pool_threads=None):
+    """Returns a Pinecone index or a LocalVectorStore with the same query / upsert surface, picked by VECTOR_STORE.
+
+    With `dimension`, vectors of any other size are refused by either backend. `pool_threads` sizes the Pinecone
+    index's connection pool (keep one index object per process so its connections are reused).
+    """
+    backend = (backend or VECTOR_STORE).lower()
+    if backend == "local":
+        return LocalVectorStore(os.path.join(LOCAL_STORE_DIR, name), dimension=dimension, metric=metric)
+    if backend != "pinecone":
+        raise ValueError(f"❌ Unknown vector store '{backend}'. Choose one of {', '.join(BACKENDS)}.")
+
+    from pinecone import Pinecone, ServerlessSpec
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    if create and name not in pc.list_indexes().names():
+        print(f"⚠️ Pinecone index '{name}' not found. Creating a new one...")
+        pc.create_index(
+            name=name,
+            dimension=dimension,
+            metric=metric,
+            spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+        )
+    index = pc.Index(name, pool_threads=pool_threads) if pool_threads else pc.Index(name)
+    return DimensionCheckedIndex(index, name, dimension) if dimension else index
+
+def bulk(index):
+    """Context manager that defers a local store's saves to the end; a no-op for Pinecone."""
+    return index.bulk() if isinstance(index, LocalVectorStore) else contextlib.nullcontext(index)
+
+def requires_pinecone_key(backend=None):
+    return (backend or VECTOR_STORE).lower() == "pinecone"
+
+# ✅ Query latency of the local backend (no network needed)
+def _benchmark(n, dim, queries, top_k):
+    import tempfile
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        store = LocalVectorStore(directory)
+        vectors = rng.normal(size=(n, dim)).astype(np.float32)
+        with store.bulk():
+            store.upsert([(f"id-{i}", v, {"row": i}) for i, v in enumerate(vectors)])
+
+        samples = []
+        for q in rng.normal(size=(queries, dim)).astype(np.float32):
+            start = time.perf_counter()
+            store.query(vector=q, top_k=top_k, include_metadata=True)
+            samples.append((time.perf_counter() - start) * 1000)
+    print(f"📦 local store, {n} x {dim}: p50 {np.percentile(samples, 50):.3f} ms, p99 {np.percentile(samples, 99):.3f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure query latency of the local vector store.")
+    parser.add_argument("--n", type=int, default=3000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+    _benchmark(args.n, args.dim, args.queries, args.k)
@@ -0,0 +1,146 @@
+import os
+import time
+import inspect
+import argparse
+import numpy as np
+from PIL import Image
+
+# ✅ ViT image embedder with pluggable inference backends
+#   torch      - eager PyTorch fp32 (original path)
+#   onnx       - model exported to ONNX, run with ONNX Runtime
+#   onnx-int8  - ONNX export with dynamic int8 weight quantization
+model_name = "google/vit-base-patch16-224-in21k"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+EMBEDDER_BACKEND = os.getenv("VIT_EMBEDDER", "torch").lower()
+ONNX_DIR = os.getenv("VIT_ONNX_DIR", "vit_onnx")
+
+class TorchEmbedder:
+    backend = "torch"
+
+    def __init__(self, name=model_name):
+        import torch
+        from transformers import AutoImageProcessor, ViTModel
+        self._torch = torch
+        self.feature_extractor = AutoImageProcessor.from_pretrained(name)
+        self.model = ViTModel.from_pretrained(name)
+        self.model.eval()
+
+    def preprocess(self, images):
+        """PIL images -> float32 pixel array of shape (N, 3, 224, 224)."""
+        return self.feature_extractor(images=[img.convert("RGB") for img in images], return_tensors="np")["pixel_values"].astype(np.float32)
+
+    def embed_pixels(self, pixel_values):
+        """One forward pass over a preprocessed batch; returns the (N, 768) CLS embeddings."""
+        with self._torch.no_grad():
+            outputs = self.model(pixel_values=self._torch.from_numpy(np.ascontiguousarray(pixel_values)))
+        return outputs.last_hidden_state[:, 0, :].numpy()
+
+    def embed_images(self, images):
+        return self.embed_pixels(self.preprocess(images))
+
+def onnx_paths(name=model_name, onnx_dir=ONNX_DIR):
+    stem = name.replace("/", "__")
+    return os.path.join(onnx_dir, f"{stem}.onnx"), os.path.join(onnx_dir, f"{stem}.int8.onnx")
+
+def export_onnx(name=model_name, onnx_dir=ONNX_DIR, quantize=False):
+    """Exports the ViT model to ONNX (and optionally a dynamic int8 copy); reuses files that already exist."""
+    fp32_path, int8_path = onnx_paths(name, onnx_dir)
+    os.makedirs(onnx_dir, exist_ok=True)
+
+    if not os.path.exists(fp32_path):
+        import torch
+        from transformers import ViTModel
+        print(f"📦 Exporting {name} to ONNX ({fp32_path})...")
+        model = ViTModel.from_pretrained(name)
+        model.eval()
+        export_kwargs = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+        tmp_path = f"{fp32_path}.tmp"
+        torch.onnx.export(
+            model,
+            (torch.zeros(1, 3, 224, 224),),
+            tmp_path,
+            input_names=["pixel_values"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "last_hidden_state": {0: "batch"}},
+            opset_version=17,
+            **export_kwargs,
+        )
+        os.replace(tmp_path, fp32_path)
+
+    if quantize and not os.path.exists(int8_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        print(f"🗜️ Quantizing ONNX model to int8 ({int8_path})...")
+        tmp_path = f"{int8_path}.tmp"
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+
+    return int8_path if quantize else fp32_path
+
+class OnnxEmbedder(TorchEmbedder):
+    """Same preprocessing as the PyTorch path; the forward pass runs in ONNX Runtime."""
+
+    def __init__(self, name=model_name, quantize=False, onnx_dir=ONNX_DIR):
+        import onnxruntime as ort
+        from transformers import AutoImageProcessor
+        self.backend = "onnx-int8" if quantize else "onnx"
+        self.feature_extractor = AutoImageProcessor.from_pretrained(name)
+        self.session = ort.InferenceSession(export_onnx(name, onnx_dir, quantize), providers=["CPUExecutionProvider"])
+
+    def embed_pixels(self, pixel_values):
+        (hidden,) = self.session.run(["last_hidden_state"], {"pixel_values": np.ascontiguousarray(pixel_values, dtype=np.float32)})
+        return hidden[:, 0, :]
+
+def get_embedder(backend=None, name=model_name):
+    backend = (backend or EMBEDDER_BACKEND).lower()
+    if backend == "torch":
+        return TorchEmbedder(name)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbedder(name, quantize=backend == "onnx-int8")
+    raise ValueError(f"❌ Unknown embedder backend '{backend}'. Choose one of {', '.join(BACKENDS)}.")
+
+# ✅ Parity & latency comparison against the PyTorch reference
+def cosine_similarities(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+def compare_backends(images, backends=BACKENDS, batch_size=16, repeats=5):
+    """Reports cosine similarity to the torch embeddings and forward-pass latency for each backend."""
+    embedders = {backend: get_embedder(backend) for backend in dict.fromkeys(("torch",) + tuple(backends))}
+    pixels = embedders["torch"].preprocess(images)
+    reference = embedders["torch"].embed_pixels(pixels)
+    batch = pixels[:batch_size]
+
+    print(f"\n{'backend':<12}{'cos mean':>10}{'cos min':>10}{'1 img ms':>11}{f'{len(batch)} img ms':>12}{'img/s':>9}")
+    results = {}
+    for backend, embedder in embedders.items():
+        cos = cosine_similarities(reference, embedder.embed_pixels(pixels))
+        timings = {}
+        for label, x in (("single", pixels[:1]), ("batch", batch)):
+            embedder.embed_pixels(x)  # warm-up
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                embedder.embed_pixels(x)
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[label] = float(np.median(samples))
+        results[backend] = {"cos_mean": float(cos.mean()), "cos_min": float(cos.min()), **timings}
+        print(
+            f"{backend:<12}{cos.mean():>10.5f}{cos.min():>10.5f}{timings['single']:>11.1f}"
+            f"{timings['batch']:>12.1f}{len(batch) / timings['batch'] * 1000:>9.1f}"
+        )
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ViT embedder backends against PyTorch.")
+    parser.add_argument("images", nargs="*", help="image files (default: up to 32 from converted_images)")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    paths = args.images or sorted(
+        os.path.join("converted_images", f) for f in os.listdir("converted_images") if f.endswith(".jpg")
+    )[:32]
+    if not paths:
+        raise SystemExit("🚨 No images to compare. Pass image paths or build converted_images first.")
+    compare_backends([Image.open(p) for p in paths], args.backends, args.batch_size)
@@ -1,144 +1,470 @@
 import os
+import time
+import json
+import hashlib
+import shutil
+import multiprocessing
 import numpy as np
-import faiss
 import torch
 from PIL import Image
-from transformers import AutoFeatureExtractor, ViTModel
+from transformers import AutoImageProcessor
+import image_index
+import image_dedup
+import vit_embedder
+from embedding_store import ShardedEmbeddingStore
 
 # ✅ Check and report on image directory contents
 image_folder = "vasavi_images"
 converted_folder = "converted_images"
+model_name = "google/vit-base-patch16-224-in21k"
+index_path = "cloth_faiss.index"
+manifest_path = "cloth_manifest.json"  # source image -> content hash & converted file
+embeddings_dir = "embedding_shards"  # content hash -> embedding, as checkpointed .npy shards
 
-# First, verify the image folder exists
-if not os.path.exists(image_folder):
-    print(f"🚨 Error: Folder '{image_folder}' does not exist!")
-    print(f"💡 Creating '{image_folder}' folder. Please add your images there.")
-    os.makedirs(image_folder, exist_ok=True)
-    exit()
+# ✅ Build settings (override through environment variables)
+BATCHED_BUILD = os.getenv("VIT_BATCHED_BUILD", "1") == "1"
+BATCH_SIZE = int(os.getenv("VIT_BATCH_SIZE", "32"))
+NUM_WORKERS = int(os.getenv("VIT_NUM_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+VERIFY_SAMPLES = int(os.getenv("VIT_VERIFY_SAMPLES", "0"))  # compare N batched embeddings against the one-by-one path
+FULL_REBUILD = os.getenv("VIT_FULL_REBUILD", "0") == "1"  # ignore the manifest and re-embed everything
+TRAIN_SAMPLE = int(os.getenv("VIT_TRAIN_SAMPLE", "65536"))  # vectors used to train IVF / SQ / PQ indexes
+NORMALIZE_MAX_SIDE = int(os.getenv("VIT_NORMALIZE_MAX_SIDE", "512"))  # converted images are downscaled to this (model input is 224px)
 
-# ✅ Create converted folder
-os.makedirs(converted_folder, exist_ok=True)
+embedder = None  # vit_embedder backend, picked with VIT_EMBEDDER (torch / onnx / onnx-int8)
 
-# ✅ Recursive function to find and process all images in any subfolder
-def process_images_recursively(folder_path, output_folder, prefix=""):
-    processed_count = 0
-    
+# ✅ Manifest helpers
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(path=manifest_path):
+    if FULL_REBUILD or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("images", {})
+    except Exception as e:
+        print(f"⚠️ Could not read manifest '{path}', rebuilding from scratch: {e}")
+        return {}
+
+def save_manifest(images, path=manifest_path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": 1, "images": images}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def converted_filename(item, prefix="", source_path=None):
+    # Clean the filename and add prefix to avoid name collisions; `source_path` adds a short hash of the source
+    # path, for sources that would otherwise share a name ("VS-300.png" / "VS-300.jpg")
+    base_name = os.path.splitext(os.path.basename(item))[0]
+    base_name = ''.join(c for c in base_name if c.isalnum() or c in '._- ')
+    if source_path is not None:
+        base_name = f"{base_name}-{hashlib.sha1(source_path.encode('utf-8')).hexdigest()[:8]}"
+    return f"{prefix}{base_name}.jpg"
+
+def _unique_outputs(tasks):
+    """Gives every source that shares a converted name with another one a hashed name instead.
+
+    All members of a clash are renamed, not all but the first, so names don't depend on directory listing order.
+    """
+    by_output = {}
+    for task in tasks:
+        by_output.setdefault(task[1], []).append(task)
+    unique = []
+    for new_path, clashing in by_output.items():
+        if len(clashing) == 1:
+            unique.extend(clashing)
+            continue
+        print(f"⚠️ {len(clashing)} images would convert to '{os.path.basename(new_path)}', giving them distinct names")
+        for full_path, _, previous, item, prefix in clashing:
+            unique.append((full_path, os.path.join(os.path.dirname(new_path), converted_filename(item, prefix, full_path)), previous, item, prefix))
+    outputs = [task[1] for task in unique]
+    if len(set(outputs)) != len(outputs):
+        raise RuntimeError("❌ Converted image names still collide; rename the clashing source images.")
+    return [task[:3] for task in unique]
+
+# ✅ Normalization of a single source image (runs in the process pool)
+def _normalize_image(task):
+    """Converts one source image to an RGB JPEG of at most NORMALIZE_MAX_SIDE pixels.
+
+    Returns (full_path, manifest entry or None, status, message) with status "unchanged", "copied",
+    "converted" or "failed".
+    """
+    full_path, new_path, previous = task
+    try:
+        stat = os.stat(full_path)
+        if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+            content_hash = previous["sha256"]
+        else:
+            content_hash = file_sha256(full_path)
+    except OSError as e:
+        return full_path, None, "failed", str(e)
+
+    entry = {"sha256": content_hash, "converted": os.path.basename(new_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    # Skip files whose converted output is already up to date
+    if os.path.exists(new_path):
+        up_to_date = (
+            previous.get("sha256") == content_hash and previous.get("converted") == entry["converted"]
+            if previous else os.stat(new_path).st_mtime_ns >= stat.st_mtime_ns
+        )
+        if up_to_date:
+            try:
+                # Perceptual hash for near-duplicate detection (manifests from older builds lack it)
+                if previous and previous.get("dhash"):
+                    entry["dhash"] = previous["dhash"]
+                else:
+                    with Image.open(new_path) as converted:
+                        entry["dhash"] = image_dedup.dhash(converted)
+            except Exception as e:
+                return full_path, None, "failed", str(e)
+            return full_path, entry, "unchanged", None
+
+    try:
+        with Image.open(full_path) as img:
+            max_side = NORMALIZE_MAX_SIDE
+            # Already a small-enough RGB JPEG: copy the bytes instead of re-encoding
+            if img.format == "JPEG" and img.mode == "RGB" and max(img.size) <= max_side:
+                shutil.copyfile(full_path, new_path)
+                entry["dhash"] = image_dedup.dhash(img)
+                return full_path, entry, "copied", None
+
+            # JPEG draft mode decodes straight at 1/2, 1/4 or 1/8 scale; other formats are reduced after decoding
+            if img.format == "JPEG":
+                img.draft("RGB", (max_side, max_side))
+            factor = max(img.size) // max_side
+            img = img.convert("RGB")
+            if factor >= 2:
+                img = img.reduce(factor)
+            if max(img.size) > max_side:
+                img.thumbnail((max_side, max_side), Image.LANCZOS)
+
+            img.save(new_path, "JPEG", quality=95)
+            entry["dhash"] = image_dedup.dhash(img)
+            return full_path, entry, "converted", None
+    except Exception as e:
+        return full_path, None, "failed", str(e)
+
+def _scan_images(folder_path, output_folder, prefix, manifest, tasks):
     if not os.path.exists(folder_path):
         print(f"⚠️ Path does not exist: {folder_path}")
-        return 0
-        
+        return
+
     # Check if this is a directory
     if not os.path.isdir(folder_path):
         print(f"⚠️ Not a directory: {folder_path}")
-        return 0
-        
+        return
+
     print(f"📂 Scanning directory: {folder_path}")
-    
+
     try:
         files = os.listdir(folder_path)
     except Exception as e:
         print(f"❌ Error reading directory {folder_path}: {e}")
-        return 0
-        
+        return
+
     print(f"📁 Found {len(files)} items in {folder_path}")
-    
+
     for item in files:
         full_path = os.path.join(folder_path, item)
-        
+
         # If it's a directory, recursively process it
         if os.path.isdir(full_path):
             print(f"📂 Found subdirectory: {item}")
             sub_prefix = f"{prefix}{item}_" if prefix else f"{item}_"
-            processed_count += process_images_recursively(full_path, output_folder, sub_prefix)
+            _scan_images(full_path, output_folder, sub_prefix, manifest, tasks)
             continue
-            
-        # Try to process as an image
-        try:
-            # First attempt: use PIL to open the file
-            with Image.open(full_path) as img:
-                # It opened successfully, so it's an image! Convert and save it
-                img = img.convert("RGB")
-                # Clean the filename and add prefix to avoid name collisions
-                base_name = os.path.splitext(os.path.basename(item))[0]
-                base_name = ''.join(c for c in base_name if c.isalnum() or c in '._- ')
-                new_filename = f"{prefix}{base_name}.jpg"
-                new_path = os.path.join(output_folder, new_filename)
-                img.save(new_path, "JPEG")
+
+        new_path = os.path.join(output_folder, converted_filename(item, prefix))
+        tasks.append((full_path, new_path, manifest.get(full_path), item, prefix))
+
+# ✅ Recursive function to find and process all images in any subfolder
+def process_images_recursively(folder_path, output_folder, prefix="", manifest=None, seen=None, num_workers=NUM_WORKERS):
+    """Normalizes new or changed images on a process pool; records every source image in `seen` (path -> manifest entry)."""
+    manifest = manifest if manifest is not None else {}
+    seen = seen if seen is not None else {}
+
+    tasks = []
+    _scan_images(folder_path, output_folder, prefix, manifest, tasks)
+    if not tasks:
+        return 0
+    tasks = _unique_outputs(tasks)
+
+    processed_count = 0
+    counts = {"unchanged": 0, "copied": 0, "converted": 0, "failed": 0}
+    chunksize = max(1, min(32, len(tasks) // (num_workers * 4) or 1))
+    with multiprocessing.Pool(num_workers) as pool:
+        for full_path, entry, status, message in pool.imap_unordered(_normalize_image, tasks, chunksize=chunksize):
+            counts[status] += 1
+            if status == "failed":
+                print(f"❌ Cannot process {full_path}: {message}")
+                # A read error is not a deletion: keep the last good conversion indexed until the next run
+                previous = manifest.get(full_path)
+                if previous and os.path.exists(os.path.join(output_folder, previous["converted"])):
+                    seen[full_path] = previous
+                    print(f"↩️ Keeping the previous conversion of {full_path}")
+                continue
+            seen[full_path] = entry
+            if status != "unchanged":
                 processed_count += 1
-                print(f"✅ Processed {full_path} -> {new_filename}")
-        except Exception as e:
-            print(f"❌ Cannot process {full_path}: {e}")
-    
+                print(f"✅ {status.capitalize()} {full_path} -> {entry['converted']}")
+
+    print(f"🧮 Normalization: {counts['converted']} converted, {counts['copied']} copied as-is, "
+          f"{counts['unchanged']} up to date, {counts['failed']} failed")
     return processed_count
 
-# Process all images recursively
-print(f"\n🔄 Recursively processing images from '{image_folder}' to '{converted_folder}'")
-converted_count = process_images_recursively(image_folder, converted_folder)
-print(f"📸 {converted_count} images processed to JPG format.")
+# ✅ Near-duplicate collapse (crops, re-exports and colour-corrected copies of the same shot)
+def collapse_near_duplicates(ordered, images, store):
+    """Keeps one representative per near-duplicate group; returns (kept source paths, {kept: [alias source paths]}).
 
-# Stop early if no images were processed
-if converted_count == 0:
-    print("\n🚨 No images could be processed. Please check your input files.")
-    exit()
+    Only shots of the same style number (read from the path below image_folder) are merged; images without one
+    are all kept.
+    """
+    hashes = [images[path]["sha256"] for path in ordered]
+    keys = [image_dedup.style_key(path, image_folder) for path in ordered]
+    unkeyed = sum(key is None for key in keys)
+    if unkeyed:
+        print(f"⚠️ {unkeyed} of {len(keys)} images have no style number in their file or folder names and are "
+              "never merged; name files or folders after the style (e.g. 'VS-101/front.jpg') to deduplicate them")
+    if unkeyed == len(keys):
+        return ordered, {}
+    groups = image_dedup.find_duplicate_groups(
+        lambda: store.iter_vectors(hashes), store.dim, [images[path]["dhash"] for path in ordered], keys
+    )
+
+    aliases, dropped = {}, set()
+    for members in groups:
+        keep = image_dedup.pick_representative(members, store.vectors([hashes[i] for i in members]))
+        aliases[ordered[keep]] = [ordered[i] for i in members if i != keep]
+        dropped.update(i for i in members if i != keep)
+
+    kept = [path for i, path in enumerate(ordered) if i not in dropped]
+    print(f"🪞 Collapsed {len(dropped)} near-duplicates into {len(groups)} representatives ({len(kept)} images indexed)")
+    return kept, aliases
 
 # ✅ Load Model & Feature Extractor
-print("\n🧠 Loading ViT model...")
-model_name = "google/vit-base-patch16-224-in21k"
-try:
-    feature_extractor = AutoFeatureExtractor.from_pretrained(model_name)
-    model = ViTModel.from_pretrained(model_name)
-    model.eval()
-    print("✅ Model loaded successfully!")
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    raise
+def load_model():
+    global embedder
+    print(f"\n🧠 Loading ViT model ({vit_embedder.EMBEDDER_BACKEND} backend)...")
+    try:
+        embedder = vit_embedder.get_embedder(name=model_name)
+        print("✅ Model loaded successfully!")
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+        raise
 
 # ✅ Function to Extract Image Embeddings
 def get_image_embedding(image_path):
     try:
         image = Image.open(image_path).convert("RGB")
-        inputs = feature_extractor(images=image, return_tensors="pt")
-        with torch.no_grad():
-            outputs = model(**inputs)
-            embedding = outputs.last_hidden_state[:, 0, :].squeeze(0)
-        
+        embedding = embedder.embed_images([image])[0]
+
         print(f"✅ Successfully processed: {os.path.basename(image_path)}")
-        return embedding.numpy()
+        return embedding
     except Exception as e:
         print(f"❌ Error processing {os.path.basename(image_path)}: {e}")
         return None
 
-# ✅ Generate Embeddings
-image_files = [os.path.join(converted_folder, f) for f in os.listdir(converted_folder) if f.endswith(".jpg")]
+# ✅ Worker-side decoding & preprocessing (runs in the process pool)
+_worker_image_processor = None
+
+def load_image_processor(name=model_name):
+    """Loads the preprocessing config once, in the parent, so a bad name or offline cache fails here, loudly."""
+    try:
+        return AutoImageProcessor.from_pretrained(name)
+    except Exception as e:
+        raise RuntimeError(f"❌ Could not load the image processor for '{name}': {e}") from e
+
+def _init_preprocess_worker(image_processor):
+    # Receives the parent's processor instead of loading one: an initializer that raises makes the pool
+    # respawn workers forever
+    global _worker_image_processor
+    # Keep each worker single-threaded so the pool doesn't oversubscribe the CPU
+    torch.set_num_threads(1)
+    _worker_image_processor = image_processor
+
+def _preprocess_image(image_path):
+    """Decodes one image and returns its model-ready pixel values (or the error)."""
+    try:
+        with Image.open(image_path) as img:
+            image = img.convert("RGB")
+        inputs = _worker_image_processor(images=image, return_tensors="np")
+        return image_path, inputs["pixel_values"][0].astype(np.float32), None
+    except Exception as e:
+        return image_path, None, str(e)
+
+def _embed_pixel_batch(pixel_batch):
+    """Runs a single ViT forward pass over a stacked batch and returns the CLS vectors."""
+    return embedder.embed_pixels(np.stack(pixel_batch))
+
+def embed_images_batched(image_paths, batch_size=BATCH_SIZE, num_workers=NUM_WORKERS):
+    """Yields (paths, embeddings) per batch while a process pool decodes & preprocesses ahead of the model."""
+    pending_paths, pending_pixels = [], []
+    done = 0
+
+    image_processor = load_image_processor(model_name)
+    chunksize = max(1, min(16, len(image_paths) // (num_workers * 4) or 1))
+    with multiprocessing.Pool(num_workers, initializer=_init_preprocess_worker, initargs=(image_processor,)) as pool:
+        for image_path, pixels, error in pool.imap(_preprocess_image, image_paths, chunksize=chunksize):
+            if pixels is None:
+                print(f"❌ Error processing {os.path.basename(image_path)}: {error}")
+                continue
+            pending_paths.append(image_path)
+            pending_pixels.append(pixels)
+            if len(pending_pixels) >= batch_size or done + len(pending_pixels) == len(image_paths):
+                done += len(pending_pixels)
+                print(f"✅ Embedded batch of {len(pending_pixels)} ({done}/{len(image_paths)})")
+                yield list(pending_paths), _embed_pixel_batch(pending_pixels)
+                pending_paths.clear()
+                pending_pixels.clear()
+        if pending_pixels:
+            print(f"✅ Embedded batch of {len(pending_pixels)} ({done + len(pending_pixels)}/{len(image_paths)})")
+            yield list(pending_paths), _embed_pixel_batch(pending_pixels)
+
+def embed_images_sequential(image_paths):
+    """Original one-image-at-a-time path, yielding (paths, embeddings) per image."""
+    for img in image_paths:
+        emb = get_image_embedding(img)
+        if emb is not None:
+            yield [img], np.asarray(emb)[None, :]
+
+def verify_batched_embeddings(embedded_paths, embeddings, samples, atol=1e-4):
+    """Checks a sample of batched embeddings against the single-image path."""
+    print(f"\n🔬 Verifying {min(samples, len(embedded_paths))} batched embeddings against the single-image path...")
+    worst, worst_cos = 0.0, 1.0
+    for path, batched in list(zip(embedded_paths, embeddings))[:samples]:
+        reference = get_image_embedding(path)
+        if reference is None:
+            continue
+        worst = max(worst, float(np.max(np.abs(reference - batched))))
+        worst_cos = min(worst_cos, float(np.dot(reference, batched) / (np.linalg.norm(reference) * np.linalg.norm(batched))))
+    if worst <= atol:
+        print(f"✅ Batched embeddings match (max abs diff {worst:.2e})")
+    else:
+        # Expected for onnx-int8: dynamic quantization scales depend on the whole batch
+        print(f"⚠️ Batched embeddings differ by up to {worst:.2e} (tolerance {atol:.0e}), min cosine {worst_cos:.5f}")
+    return worst
+
+def main():
+    # First, verify the image folder exists
+    if not os.path.exists(image_folder):
+        print(f"🚨 Error: Folder '{image_folder}' does not exist!")
+        print(f"💡 Creating '{image_folder}' folder. Please add your images there.")
+        os.makedirs(image_folder, exist_ok=True)
+        return
+
+    # ✅ Create converted folder
+    os.makedirs(converted_folder, exist_ok=True)
+
+    # Process all images recursively (only new or changed files are converted)
+    manifest = load_manifest()
+    images = {}
+    print(f"\n🔄 Recursively processing images from '{image_folder}' to '{converted_folder}'")
+    converted_count = process_images_recursively(image_folder, converted_folder, manifest=manifest, seen=images)
+    print(f"📸 {converted_count} images processed to JPG format, {len(images) - converted_count} unchanged.")
+
+    # Drop converted files whose source image was deleted (not ones that merely failed to convert this run)
+    live_files = {entry["converted"] for entry in images.values()}
+    removed = [path for path in manifest if path not in images and not os.path.exists(path)]
+    for path in removed:
+        stale = manifest[path]["converted"]
+        if stale not in live_files and os.path.exists(os.path.join(converted_folder, stale)):
+            os.remove(os.path.join(converted_folder, stale))
+    if removed:
+        print(f"🗑️ Dropped {len(removed)} deleted images.")
+
+    # Stop early if no images were processed
+    if not images:
+        print("\n🚨 No images could be processed. Please check your input files.")
+        return
+
+    # ✅ Reuse stored embeddings, embed only new content (also resumes an interrupted build)
+    # Vectors are only reused from the same model & backend (VIT_EMBEDDER torch / onnx / onnx-int8)
+    store = ShardedEmbeddingStore(embeddings_dir, source={"model": model_name, "embedder": vit_embedder.EMBEDDER_BACKEND})
+    if FULL_REBUILD:
+        store.clear()
+    pending = {}
+    for entry in images.values():
+        if entry["sha256"] not in store:
+            pending.setdefault(entry["sha256"], os.path.join(converted_folder, entry["converted"]))
+
+    # 🔹 Print number of images found
+    print(f"\n🖼️ Found {len(images)} images, {len(store)} embeddings on disk, {len(pending)} need new embeddings")
+
+    if pending:
+        load_model()
+        image_files = list(pending.values())
+        hash_by_path = {path: content_hash for content_hash, path in pending.items()}
+        embedded = 0
+        start = time.perf_counter()
+        if BATCHED_BUILD:
+            print(f"\n🔄 Generating embeddings (batch size {BATCH_SIZE}, {NUM_WORKERS} workers)...")
+            batches = embed_images_batched(image_files)
+        else:
+            print("\n🔄 Generating embeddings...")
+            batches = embed_images_sequential(image_files)
+
+        try:
+            for paths, vectors in batches:
+                if BATCHED_BUILD and VERIFY_SAMPLES > 0 and embedded == 0:
+                    verify_batched_embeddings(paths, vectors, VERIFY_SAMPLES)
+                # Full shards are written & checkpointed as soon as they fill up
+                store.add([hash_by_path[path] for path in paths], vectors)
+                embedded += len(paths)
+        finally:
+            # Keep whatever finished, even when the run is interrupted
+            store.flush()
+        elapsed = time.perf_counter() - start
+
+        # 🔹 Print how many embeddings were created
+        print(f"\n🧩 Successfully created embeddings for {embedded} images.")
+        if embedded:
+            print(f"⏱️ {elapsed:.1f}s total, {embedded / elapsed:.1f} images/sec")
 
-# 🔹 Print number of images found
-print(f"\n🖼️ Found {len(image_files)} images in {converted_folder}")
+    # Images whose embedding failed stay out of the manifest so the next run retries them
+    images = {path: entry for path, entry in images.items() if entry["sha256"] in store}
 
-if len(image_files) == 0:
-    print("🚨 No images found! Please check your input folder and try again.")
-    exit()
+    # ✅ Check if any images failed
+    if not images:
+        print("🚨 No valid embeddings! Check your images.")
+        return
 
-print("\n🔄 Generating embeddings...")
-embeddings = []
-for img in image_files:
-    emb = get_image_embedding(img)
-    if emb is not None:
-        embeddings.append(emb)
+    # ✅ Save FAISS Index, streamed from memory-mapped shards
+    print("\n💾 Creating and saving FAISS index...")
+    ordered = sorted(images)
+    aliases = {}
+    if image_dedup.DEDUP and len(ordered) > 1:
+        ordered, aliases = collapse_near_duplicates(ordered, images, store)
+    hashes = [images[path]["sha256"] for path in ordered]
+    train_vectors = None
+    if image_index.INDEX_TYPE not in ("flat", "hnsw"):
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(hashes), size=min(TRAIN_SAMPLE, len(hashes)), replace=False)
+        train_vectors = store.vectors([hashes[i] for i in sorted(sample)])
+    index = image_index.build_index_from_chunks(store.iter_vectors(hashes), store.dim, len(hashes), train_vectors)
+    index_info = image_index.describe_index(index)
+    print(f"🧭 Index type: {index_info}")
+    image_index.save_index(index, index_path)
 
-# ✅ Check if any images failed
-if not embeddings:
-    print("🚨 No valid embeddings! Check your images.")
-    exit()
+    # Row id -> product sidecar, loaded once by imageRecom
+    converted_path = lambda path: os.path.join(converted_folder, images[path]["converted"])
+    image_index.write_sidecar(
+        index_path,
+        [converted_path(path) for path in ordered],
+        index_info=index_info,
+        aliases={converted_path(kept): [converted_path(a) for a in group] for kept, group in aliases.items()},
+    )
 
-# 🔹 Print how many embeddings were created
-print(f"\n🧩 Successfully created embeddings for {len(embeddings)} images.")
+    # Drop embeddings of deleted images once they take up too much of the store (aliases keep theirs)
+    dropped = store.compact({entry["sha256"] for entry in images.values()})
+    if dropped:
+        print(f"🗜️ Compacted embedding shards, dropped {dropped} stale embeddings.")
+    save_manifest(images)
 
-# ✅ Save FAISS Index
-print("\n💾 Creating and saving FAISS index...")
-embeddings_array = np.array(embeddings)
-d = embeddings_array.shape[1]  # Embedding dimension
-index = faiss.IndexFlatL2(d)
-index.add(embeddings_array)
-faiss.write_index(index, "cloth_faiss.index")
+    print(f"🎉 FAISS index saved as '{index_path}' with {len(ordered)} images!")
 
-print(f"🎉 FAISS index saved as 'cloth_faiss.index' with {len(embeddings)} images!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()